@@ -1,11 +1,18 @@
 """API endpoints for document management."""
+import asyncio
+import hashlib
 import logging
 import os
-from typing import List
-from fastapi import APIRouter, HTTPException
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import aiofiles.os
+from fastapi import APIRouter, HTTPException, Request, Response
 from app.models.schemas import DocumentInfo, DocumentListResponse
-from app.services.rag_service import RAGService
-from app.services.vector_store import VectorStore
+from app.services.rag_service import get_rag_service
+from app.services.doc_metadata_db import get_metadata_db
+from app.services.document_processor import DocumentProcessor
+from app.utils.uploads import scan_uploads
 from app.config import settings
 from datetime import datetime
 
@@ -13,56 +20,169 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/documents", tags=["documents"])
 
-# Initialize services
-rag_service = RAGService()
-vector_store = VectorStore()
+# Initialize services (shared with the other routers)
+rag_service = get_rag_service()
+vector_store = rag_service.vector_store
+metadata_db = get_metadata_db()
+doc_processor = DocumentProcessor()
+
+# Max documents loaded concurrently when listing
+LIST_CONCURRENCY = 16
+
+
+@lru_cache(maxsize=4096)
+def _cached_page_count(path: str, mtime_ns: int) -> int:
+    """
+    Get a PDF's page count, cached per (path, mtime) so unchanged files are
+    only parsed once.
+    """
+    return doc_processor.get_page_count(path)
+
+
+def _get_file_meta(entry: os.DirEntry) -> Tuple[int, float, int]:
+    """
+    Get (size, ctime, page_count) for a document file.
+
+    Args:
+        entry: Directory entry of the document file
+
+    Returns:
+        Tuple of (file size in bytes, creation timestamp, page count)
+    """
+    stat = entry.stat()
+
+    page_count = 0
+    if Path(entry.name).suffix.lower() == ".pdf":
+        page_count = _cached_page_count(entry.path, stat.st_mtime_ns)
+
+    return stat.st_size, stat.st_ctime, page_count
+
+
+def _doc_info_from_row(row: Dict[str, Any], chunk_count: int) -> DocumentInfo:
+    """Build DocumentInfo from a metadata database row."""
+    return DocumentInfo(
+        document_id=row["document_id"],
+        filename=row["filename"],
+        file_size=row["size"],
+        page_count=row["page_count"],
+        uploaded_at=datetime.fromtimestamp(row["uploaded_at"]),
+        chunk_count=chunk_count
+    )
+
+
+def _doc_info_from_disk(doc_id: str, entry: Optional[os.DirEntry], chunk_count: int) -> DocumentInfo:
+    """Build DocumentInfo from the stored file, for documents with no metadata row."""
+    filename = entry.name if entry is not None else doc_id
+    file_size = 0
+    page_count = 0
+    uploaded_at = datetime.now()
+
+    if entry is not None:
+        file_size, ctime, page_count = _get_file_meta(entry)
+        uploaded_at = datetime.fromtimestamp(ctime)
+
+    return DocumentInfo(
+        document_id=doc_id,
+        filename=filename,
+        file_size=file_size,
+        page_count=page_count,
+        uploaded_at=uploaded_at,
+        chunk_count=chunk_count
+    )
+
+
+def _load_doc_info(
+    doc_id: str,
+    row: Optional[Dict[str, Any]],
+    entry: Optional[os.DirEntry],
+    chunk_count: int
+) -> DocumentInfo:
+    """
+    Load one document's info (blocking; run in a worker thread).
+
+    Args:
+        doc_id: Document ID
+        row: Metadata database row, if any
+        entry: Stored file's directory entry, used when there is no row
+        chunk_count: Number of stored chunks
+
+    Returns:
+        DocumentInfo for the document
+    """
+    if row is not None:
+        return _doc_info_from_row(row, chunk_count)
+    return _doc_info_from_disk(doc_id, entry, chunk_count)
+
+
+def _listing_etag(
+    chunk_counts: Dict[str, int],
+    rows: Dict[str, Dict[str, Any]],
+    entries: Dict[str, os.DirEntry]
+) -> str:
+    """
+    Compute an ETag for the document listing.
+
+    The tag covers the sorted document IDs plus each document's upload time
+    (or file mtime for documents without a metadata row), chunk count and
+    whether its metadata row exists. A document still being indexed gains
+    chunks, and then its row, so the tag keeps changing until it is done.
+    """
+    hasher = hashlib.md5(usedforsecurity=False)
+    for doc_id in sorted(chunk_counts):
+        row = rows.get(doc_id)
+        if row is not None:
+            version = row["uploaded_at"]
+        else:
+            entry = entries.get(doc_id)
+            version = entry.stat().st_mtime_ns if entry is not None else 0
+        hasher.update(f"{doc_id}:{version}:{chunk_counts[doc_id]}:{row is not None};".encode())
+    return f'"{hasher.hexdigest()}"'
 
 
 @router.get("", response_model=DocumentListResponse)
-async def list_documents():
+async def list_documents(request: Request, response: Response):
     """
     List all uploaded documents.
 
+    Supports conditional requests: responds 304 Not Modified when the
+    client's If-None-Match matches the current listing's ETag.
+
     Returns:
         DocumentListResponse with list of all documents
     """
     try:
-        # Get document IDs from vector store
-        document_ids = vector_store.list_documents()
-
-        documents = []
-        for doc_id in document_ids:
-            # Get chunk count
-            stats = rag_service.get_document_stats(doc_id)
-
-            # Try to get file info from disk
-            pdf_path = os.path.join(settings.upload_dir, f"{doc_id}.pdf")
-            file_size = 0
-            filename = f"{doc_id}.pdf"
-            uploaded_at = datetime.now()
-
-            if os.path.exists(pdf_path):
-                file_size = os.path.getsize(pdf_path)
-                uploaded_at = datetime.fromtimestamp(os.path.getctime(pdf_path))
-
-                # Try to extract original filename from metadata
-                # (In a production app, you'd store this in a database)
-
-            # Get page count (placeholder - would need to be stored)
-            from app.services.pdf_processor import PDFProcessor
-            processor = PDFProcessor()
-            page_count = processor.get_page_count(pdf_path) if os.path.exists(pdf_path) else 0
-
-            doc_info = DocumentInfo(
-                document_id=doc_id,
-                filename=filename,
-                file_size=file_size,
-                page_count=page_count,
-                uploaded_at=uploaded_at,
-                chunk_count=stats["chunk_count"]
-            )
-
-            documents.append(doc_info)
+        # Document IDs and chunk counts from one vector store scan; the same
+        # counts feed the ETag and the listing, so the two always agree
+        chunk_counts = await asyncio.to_thread(vector_store.document_chunk_counts)
+        document_ids = list(chunk_counts)
+
+        # One query for all stored metadata
+        rows = await asyncio.to_thread(metadata_db.list_all)
+
+        # Only scan the upload directory if some document has no metadata row
+        entries = {}
+        if any(doc_id not in rows for doc_id in document_ids):
+            entries = await asyncio.to_thread(scan_uploads)
+
+        # Skip building the listing if the client's copy is current
+        etag = await asyncio.to_thread(_listing_etag, chunk_counts, rows, entries)
+        client_etags = request.headers.get("if-none-match", "")
+        if etag in (tag.strip().removeprefix("W/") for tag in client_etags.split(",")):
+            return Response(status_code=304, headers={"ETag": etag})
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = "no-cache"
+
+        # Load documents concurrently in worker threads, overlapping any
+        # fallback file stats and PDF parsing
+        semaphore = asyncio.Semaphore(LIST_CONCURRENCY)
+
+        async def load(doc_id: str) -> DocumentInfo:
+            async with semaphore:
+                return await asyncio.to_thread(
+                    _load_doc_info, doc_id, rows.get(doc_id), entries.get(doc_id), chunk_counts[doc_id]
+                )
+
+        documents = list(await asyncio.gather(*(load(doc_id) for doc_id in document_ids)))
 
         return DocumentListResponse(
             documents=documents,
@@ -90,7 +210,7 @@ async def delete_document(document_id: str):
     """
     try:
         # Delete from vector store
-        success = rag_service.delete_document(document_id)
+        success = await asyncio.to_thread(rag_service.delete_document, document_id)
 
         if not success:
             raise HTTPException(
@@ -98,11 +218,13 @@ async def delete_document(document_id: str):
                 detail=f"Document {document_id} not found"
             )
 
-        # Delete PDF file
-        pdf_path = os.path.join(settings.upload_dir, f"{document_id}.pdf")
-        if os.path.exists(pdf_path):
-            os.remove(pdf_path)
-            logger.info(f"Deleted file: {pdf_path}")
+        # Delete stored file (whatever its extension) and metadata
+        entry = (await asyncio.to_thread(scan_uploads)).get(document_id)
+        if entry is not None:
+            await aiofiles.os.remove(entry.path)
+            logger.info(f"Deleted file: {entry.path}")
+
+        await asyncio.to_thread(metadata_db.delete, [document_id])
 
         return {
             "message": f"Document {document_id} deleted successfully"
@@ -130,7 +252,7 @@ async def get_document(document_id: str):
         Document information
     """
     try:
-        stats = rag_service.get_document_stats(document_id)
+        stats = await asyncio.to_thread(rag_service.get_document_stats, document_id)
 
         if stats["chunk_count"] == 0:
             raise HTTPException(
@@ -138,29 +260,20 @@ async def get_document(document_id: str):
                 detail=f"Document {document_id} not found"
             )
 
+        row = await asyncio.to_thread(metadata_db.get, document_id)
+        if row is not None:
+            return _doc_info_from_row(row, stats["chunk_count"])
+
         # Get file info
-        pdf_path = os.path.join(settings.upload_dir, f"{document_id}.pdf")
-        if not os.path.exists(pdf_path):
+        entry = (await asyncio.to_thread(scan_uploads)).get(document_id)
+        if entry is None:
             raise HTTPException(
                 status_code=404,
-                detail=f"Document file {document_id}.pdf not found"
+                detail=f"Document file for {document_id} not found"
             )
 
-        file_size = os.path.getsize(pdf_path)
-        uploaded_at = datetime.fromtimestamp(os.path.getctime(pdf_path))
-
-        from app.services.pdf_processor import PDFProcessor
-        processor = PDFProcessor()
-        page_count = processor.get_page_count(pdf_path)
-
-        return DocumentInfo(
-            document_id=document_id,
-            filename=f"{document_id}.pdf",
-            file_size=file_size,
-            page_count=page_count,
-            uploaded_at=uploaded_at,
-            chunk_count=stats["chunk_count"]
-        )
+        # Stats the file and may parse it for a page count
+        return await asyncio.to_thread(_doc_info_from_disk, document_id, entry, stats["chunk_count"])
 
     except HTTPException:
         raise
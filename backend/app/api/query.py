@@ -1,15 +1,27 @@
 """API endpoint for querying documents."""
+import asyncio
 import logging
-from fastapi import APIRouter, HTTPException
+import time
+from fastapi import APIRouter, HTTPException, Response
 from app.models.schemas import QueryRequest, QueryResponse
-from app.services.rag_service import RAGService
+from app.services.rag_service import get_rag_service
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/query", tags=["query"])
 
 # Initialize RAG service
-rag_service = RAGService()
+rag_service = get_rag_service()
+
+
+def _json_response(response: QueryResponse) -> Response:
+    """
+    Serialize a QueryResponse once with pydantic's native JSON encoder.
+
+    Returning a ready Response skips FastAPI's response_model re-validation
+    and its jsonable_encoder + stdlib json pass over the citations.
+    """
+    return Response(content=response.model_dump_json(), media_type="application/json")
 
 
 @router.post("", response_model=QueryResponse)
@@ -41,11 +53,30 @@ async def query_documents(request: QueryRequest):
                 detail="Question cannot be empty"
             )
 
+        start_time = time.time()
+
+        # Serve near-identical questions from the semantic cache
+        cache_scope = (request.document_id, request.max_citations)
+        # An upload or delete while this query runs clears the cache; the
+        # answer, computed on the old documents, must not be cached after it
+        cache_generation = rag_service.query_cache.generation
+        question_embedding = await asyncio.to_thread(rag_service.embed_question, request.question)
+        cached = rag_service.query_cache.get(question_embedding, scope=cache_scope)
+        if cached is not None:
+            return _json_response(cached.model_copy(update={
+                "question": request.question,
+                "processing_time_ms": (time.time() - start_time) * 1000
+            }))
+
         # Query the RAG service
-        response = rag_service.query(
+        response = await rag_service.aquery(
             question=request.question,
             document_id=request.document_id,
-            max_citations=request.max_citations
+            max_citations=request.max_citations,
+            query_embedding=question_embedding
+        )
+        rag_service.query_cache.add(
+            question_embedding, response, scope=cache_scope, generation=cache_generation
         )
 
         logger.info(
@@ -53,7 +84,7 @@ async def query_documents(request: QueryRequest):
             f"{response.processing_time_ms:.2f}ms"
         )
 
-        return response
+        return _json_response(response)
 
     except HTTPException:
         raise
@@ -1,14 +1,20 @@
 """API endpoint for document upload."""
+import asyncio
+import hashlib
 import logging
 import os
 import uuid
 from datetime import datetime
 from pathlib import Path
+import aiofiles
+import aiofiles.os
 from fastapi import APIRouter, UploadFile, File, HTTPException
 from fastapi.responses import JSONResponse
 from app.models.schemas import DocumentUploadResponse, ErrorResponse
-from app.services.rag_service import RAGService
+from app.services.rag_service import get_rag_service
 from app.services.document_processor import DocumentProcessor
+from app.services.doc_metadata_db import get_metadata_db
+from app.utils.uploads import scan_uploads
 from app.config import settings
 
 logger = logging.getLogger(__name__)
@@ -16,8 +22,12 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/upload", tags=["upload"])
 
 # Initialize RAG service and document processor
-rag_service = RAGService()
+rag_service = get_rag_service()
 doc_processor = DocumentProcessor()
+metadata_db = get_metadata_db()
+
+# Read uploads in 1 MiB pieces so memory use doesn't scale with file size
+UPLOAD_CHUNK_SIZE = 1 << 20
 
 
 @router.post("", response_model=DocumentUploadResponse)
@@ -50,48 +60,75 @@ async def upload_document(file: UploadFile = File(...)):
                 detail=f"Unsupported file type: {file_ext}. Supported formats: {', '.join(supported_extensions)}"
             )
 
-        # Validate file size
-        contents = await file.read()
-        file_size = len(contents)
+        # Generate unique document ID
+        document_id = str(uuid.uuid4())
 
-        if file_size > settings.max_file_size_bytes:
-            raise HTTPException(
-                status_code=400,
-                detail=f"File size ({file_size} bytes) exceeds maximum allowed size ({settings.max_file_size_bytes} bytes)"
+        # Stream file to disk with original extension, enforcing the size limit
+        upload_path = os.path.join(settings.upload_dir, f"{document_id}{file_ext}")
+        file_size = 0
+        hasher = hashlib.sha256()
+        try:
+            async with aiofiles.open(upload_path, "wb") as f:
+                while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                    file_size += len(chunk)
+                    hasher.update(chunk)
+                    if file_size > settings.max_file_size_bytes:
+                        raise HTTPException(
+                            status_code=400,
+                            detail=f"File size exceeds maximum allowed size ({settings.max_file_size_bytes} bytes)"
+                        )
+                    await f.write(chunk)
+        except BaseException:
+            if await aiofiles.os.path.exists(upload_path):
+                await aiofiles.os.remove(upload_path)
+            raise
+
+        logger.info(f"Saved uploaded file: {file.filename} -> {upload_path}")
+
+        existing_docs = []
+        try:
+            existing_docs = await asyncio.to_thread(rag_service.vector_store.list_documents)
+        except Exception as e:
+            logger.warning(f"Could not list existing documents: {e}")
+
+        # Identical file already indexed: keep it and skip the whole pipeline
+        digest = hasher.hexdigest()
+        duplicate = await asyncio.to_thread(metadata_db.find_by_sha256, digest)
+        if duplicate and duplicate["document_id"] in existing_docs:
+            await aiofiles.os.remove(upload_path)
+            logger.info(f"Upload {file.filename} matches document {duplicate['document_id']}, skipping indexing")
+            return DocumentUploadResponse(
+                document_id=duplicate["document_id"],
+                filename=duplicate["filename"],
+                file_size=duplicate["size"],
+                page_count=duplicate["page_count"],
+                uploaded_at=datetime.fromtimestamp(duplicate["uploaded_at"]),
+                status="completed"
             )
 
-        # Auto-cleanup: Delete all existing documents before uploading new one
+        # Auto-cleanup: Delete all existing documents before indexing the new one
         # This ensures a clean state for each upload
         try:
-            existing_docs = rag_service.vector_store.list_documents()
             if existing_docs:
                 logger.info(f"Auto-cleanup: Removing {len(existing_docs)} existing document(s)")
+                await asyncio.to_thread(rag_service.delete_documents_batch, existing_docs)
+                await asyncio.to_thread(metadata_db.delete, existing_docs)
+
+                # Remove their files with one directory scan (any extension)
+                files_by_stem = await asyncio.to_thread(scan_uploads)
                 for old_doc_id in existing_docs:
-                    rag_service.delete_document(old_doc_id)
-                    # Also remove the file (check all possible extensions)
-                    for ext in supported_extensions:
-                        old_file_path = os.path.join(settings.upload_dir, f"{old_doc_id}{ext}")
-                        if os.path.exists(old_file_path):
-                            os.remove(old_file_path)
-                            logger.info(f"Deleted old file: {old_file_path}")
+                    entry = files_by_stem.get(old_doc_id)
+                    if entry is not None:
+                        await aiofiles.os.remove(entry.path)
+                        logger.info(f"Deleted old file: {entry.path}")
                 logger.info("Auto-cleanup completed")
         except Exception as e:
             logger.warning(f"Auto-cleanup failed (non-critical): {e}")
             # Continue with upload even if cleanup fails
 
-        # Generate unique document ID
-        document_id = str(uuid.uuid4())
-
-        # Save file with original extension
-        upload_path = os.path.join(settings.upload_dir, f"{document_id}{file_ext}")
-        with open(upload_path, "wb") as f:
-            f.write(contents)
-
-        logger.info(f"Saved uploaded file: {file.filename} -> {upload_path}")
-
         # Process and index the document
         try:
-            indexing_stats = rag_service.index_document(
+            indexing_stats = await rag_service.aindex_document(
                 document_id=document_id,
                 filename=file.filename,
                 file_path=upload_path
@@ -99,20 +136,31 @@ async def upload_document(file: UploadFile = File(...)):
 
             logger.info(f"Successfully indexed document {document_id}: {indexing_stats}")
 
+            uploaded_at = datetime.now()
+            await asyncio.to_thread(
+                metadata_db.add,
+                document_id=document_id,
+                filename=file.filename,
+                size=file_size,
+                page_count=indexing_stats["page_count"],
+                uploaded_at=uploaded_at.timestamp(),
+                sha256=digest
+            )
+
             # Return response
             return DocumentUploadResponse(
                 document_id=document_id,
                 filename=file.filename,
                 file_size=file_size,
                 page_count=indexing_stats["page_count"],
-                uploaded_at=datetime.now(),
+                uploaded_at=uploaded_at,
                 status="completed"
             )
 
         except Exception as e:
             # Clean up file on error
-            if os.path.exists(upload_path):
-                os.remove(upload_path)
+            if await aiofiles.os.path.exists(upload_path):
+                await aiofiles.os.remove(upload_path)
             raise
 
     except HTTPException:
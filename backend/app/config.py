@@ -1,4 +1,5 @@
 """Application configuration and settings."""
+from functools import cached_property
 from pydantic_settings import BaseSettings
 from typing import List
 
@@ -20,6 +21,10 @@ class Settings(BaseSettings):
 
     # Vector Database
     chroma_db_path: str = "./chroma_db"
+    embedding_cache_path: str = "./embedding_cache.db"
+    segment_cache_dir: str = "./segment_cache"
+    vector_store_batch_size: int = 128  # Chunks per vector store insert
+    in_memory_ann: bool = True  # Serve searches from an in-process HNSW mirror
 
     # Application
     app_env: str = "development"
@@ -29,29 +34,42 @@ class Settings(BaseSettings):
     # File Upload
     max_file_size_mb: int = 50
     upload_dir: str = "./uploads"
+    metadata_db_path: str = "./documents.db"
     allowed_file_types: str = "pdf"
+    pdf_fast_extract: bool = True  # pypdf text path; False = pdfplumber (layout-aware)
 
     # Embedding
     embedding_model: str = "text-embedding-3-small"
+    embedding_batch_size: int = 64  # Texts per embedding request
+    embedding_memory_cache_size: int = 10000  # Vectors kept in the in-memory LRU
+    embedding_concurrency: int = 4  # Embedding requests in flight at once
     chunk_size: int = 1000
     chunk_overlap: int = 200
 
+    # Parallel processing
+    max_worker_processes: int = 0  # 0 = one per CPU core
+    max_concurrent_llm: int = 4  # Concurrent LLM generations from async queries
+
+    # Semantic query cache
+    semantic_cache_threshold: float = 0.95  # Cosine similarity for a cache hit
+    semantic_cache_size: int = 1000  # Max cached answers (LRU eviction)
+
     # Security
     secret_key: str = "dev-secret-key-change-in-production"
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
 
-    @property
+    @cached_property
     def cors_origins_list(self) -> List[str]:
         """Parse CORS origins string into list."""
         return [origin.strip() for origin in self.cors_origins.split(",")]
 
-    @property
+    @cached_property
     def allowed_file_types_list(self) -> List[str]:
         """Parse allowed file types string into list."""
         return [ft.strip() for ft in self.allowed_file_types.split(",")]
 
-    @property
+    @cached_property
     def max_file_size_bytes(self) -> int:
         """Convert max file size from MB to bytes."""
         return self.max_file_size_mb * 1024 * 1024
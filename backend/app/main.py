@@ -1,11 +1,18 @@
-"""Main FastAPI application."""
+"""Main FastAPI application.
+
+The app is built by create_app on first access to ``app``, not at import.
+Process pool workers are spawned, and spawn re-imports the launching module
+(this one, under ``python -m app.main``) in every worker; keeping the import
+free of routers and services means workers never open their own Chroma
+client, SQLite connections or in-memory index.
+"""
 import os
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from app.config import settings
 from app.models.schemas import HealthCheckResponse
-from app.api import upload, query, documents
+from app.utils.process_pool import shutdown_process_pool
 import logging
 
 # Configure logging
@@ -15,35 +22,53 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Create FastAPI app
-app = FastAPI(
-    title="Smart Document Assistant API",
-    description="RAG-powered document Q&A with citation highlighting",
-    version="1.0.0",
-    docs_url="/api/docs",
-    redoc_url="/api/redoc"
-)
 
-# Configure CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=settings.cors_origins_list,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+def create_app() -> FastAPI:
+    """
+    Build the FastAPI application with its routers and services.
+
+    Returns:
+        Configured FastAPI app
+    """
+    # Importing the routers constructs the RAG service and stores
+    from app.api import upload, query, documents
 
-# Ensure required directories exist
-os.makedirs(settings.upload_dir, exist_ok=True)
-os.makedirs(settings.chroma_db_path, exist_ok=True)
+    # Create FastAPI app
+    app = FastAPI(
+        title="Smart Document Assistant API",
+        description="RAG-powered document Q&A with citation highlighting",
+        version="1.0.0",
+        docs_url="/api/docs",
+        redoc_url="/api/redoc"
+    )
+
+    # Configure CORS
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=settings.cors_origins_list,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
 
-# Register API routers
-app.include_router(upload.router)
-app.include_router(query.router)
-app.include_router(documents.router)
+    # Ensure required directories exist
+    os.makedirs(settings.upload_dir, exist_ok=True)
+    os.makedirs(settings.chroma_db_path, exist_ok=True)
+
+    # Register API routers
+    app.include_router(upload.router)
+    app.include_router(query.router)
+    app.include_router(documents.router)
+
+    app.add_event_handler("startup", startup_event)
+    app.add_event_handler("shutdown", shutdown_event)
+    app.add_api_route("/", root, methods=["GET"], response_model=HealthCheckResponse)
+    app.add_api_route("/health", health_check, methods=["GET"], response_model=HealthCheckResponse)
+    app.add_exception_handler(Exception, global_exception_handler)
+
+    return app
 
 
-@app.on_event("startup")
 async def startup_event():
     """Run on application startup."""
     logger.info("Starting Smart Document Assistant API")
@@ -51,13 +76,12 @@ async def startup_event():
     logger.info(f"CORS origins: {settings.cors_origins_list}")
 
 
-@app.on_event("shutdown")
 async def shutdown_event():
     """Run on application shutdown."""
     logger.info("Shutting down Smart Document Assistant API")
+    shutdown_process_pool()
 
 
-@app.get("/", response_model=HealthCheckResponse)
 async def root():
     """Root endpoint with health check."""
     return HealthCheckResponse(
@@ -66,7 +90,6 @@ async def root():
     )
 
 
-@app.get("/health", response_model=HealthCheckResponse)
 async def health_check():
     """Health check endpoint."""
     return HealthCheckResponse(
@@ -75,8 +98,6 @@ async def health_check():
     )
 
 
-# Exception handlers
-@app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
     """Global exception handler."""
     logger.error(f"Unhandled exception: {exc}", exc_info=True)
@@ -89,6 +110,14 @@ async def global_exception_handler(request, exc):
     )
 
 
+def __getattr__(name: str):
+    """Build ``app`` on first access, so ``uvicorn app.main:app`` keeps working."""
+    if name == "app":
+        app = globals()["app"] = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
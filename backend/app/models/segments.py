@@ -0,0 +1,12 @@
+"""Extracted text segment shared by the document processors and chunker."""
+from dataclasses import dataclass
+
+
+@dataclass(slots=True, frozen=True)
+class TextSegment:
+    """Text segment with position information."""
+    text: str
+    page_number: int
+    char_start: int  # Character position within the document
+    char_end: int
+    bbox: tuple  # Bounding box (x0, y0, x1, y1) for potential future use
@@ -0,0 +1,297 @@
+"""In-process HNSW index mirroring the vector store for fast reads."""
+import logging
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+import hnswlib
+import numpy as np
+from app.services.chunker import DocumentChunk
+
+logger = logging.getLogger(__name__)
+
+# Graph parameters, matching the Chroma collection's HNSW settings
+ANN_M = 16
+ANN_CONSTRUCTION_EF = 64
+ANN_SEARCH_EF = 100
+
+# Smallest partition ever allocated; capacity doubles as a partition fills
+ANN_PARTITION_MIN_CAPACITY = 256
+
+# Global graph slots and rerank rows reserved when the first chunk is
+# added; both double as they fill
+ANN_INITIAL_CAPACITY = 1024
+
+# Candidates fetched per requested result before the exact rerank
+ANN_RERANK_OVERSAMPLE = 3
+
+# Storage type of the rerank vectors; half precision is ample for ranking
+# a handful of candidates and halves the pages touched
+ANN_VECTOR_DTYPE = np.float16
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """Scale rows to unit length (zero rows are left as zeros)."""
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def _new_graph(dim: int, capacity: int) -> hnswlib.Index:
+    """Create an empty HNSW graph with room for ``capacity`` items."""
+    # Vectors are normalized on the way in, so inner product is cosine
+    # similarity without the per-comparison norm
+    index = hnswlib.Index(space="ip", dim=dim)
+    index.init_index(max_elements=capacity, ef_construction=ANN_CONSTRUCTION_EF, M=ANN_M)
+    index.set_ef(ANN_SEARCH_EF)
+    return index
+
+
+class _ReadWriteLock:
+    """Lock letting searches run together while adds and deletes run alone.
+
+    Waiting writers block new readers, so a steady stream of queries cannot
+    starve an indexing call.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writers_waiting = 0
+        self._writing = False
+
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        with self._cond:
+            while self._writing or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        with self._cond:
+            self._writers_waiting += 1
+            while self._writing or self._readers:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._writing = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writing = False
+                self._cond.notify_all()
+
+
+class ANNIndex:
+    """Inner-product HNSW index over unit-length chunk embeddings, keyed by chunk ID.
+
+    Every chunk lives in one global HNSW graph, which answers unfiltered
+    queries with a single graph search. Each document also gets its own
+    partition graph, so a query restricted to one document searches only
+    that document's chunks instead of filtering a global result. Chroma
+    stays the persistent store; this index is rebuilt from it at start-up
+    and kept in step by the vector store's add and delete calls, so queries
+    never touch SQLite.
+    """
+
+    def __init__(self, vectors_dir: Optional[str] = None):
+        """
+        Initialize an empty index (the dimension is taken from the first add).
+
+        Args:
+            vectors_dir: Directory for the memory-mapped rerank vectors; they
+                are kept in anonymous memory when omitted
+        """
+        self._dim: Optional[int] = None
+        self._index: Optional[hnswlib.Index] = None  # every chunk
+        self._partitions: Dict[str, hnswlib.Index] = {}  # document_id -> graph
+        # document_id -> labels holding a slot in its graph, live or tombstoned
+        self._partition_slots: Dict[str, set] = {}
+        # Unit-length embeddings by label, for the exact rerank. Backed by an
+        # unlinked scratch file so the OS can page cold rows out; it is
+        # rebuilt from Chroma on every start, so nothing is persisted.
+        self._vectors_file = tempfile.TemporaryFile(dir=vectors_dir, suffix=".f16") if vectors_dir else None
+        self._vectors: Optional[np.ndarray] = None
+        self._lock = _ReadWriteLock()
+        self._next_label = 0
+        # Labels of replaced chunks and deleted documents. They are tombstoned
+        # in the global graph, so re-adding one revives its slot (and its
+        # partition slot, when it lands back in the same document).
+        self._free_labels: List[int] = []
+        self._labels: Dict[str, int] = {}  # chunk_id -> label
+        self._chunks: Dict[int, DocumentChunk] = {}  # label -> chunk
+        self._doc_labels: Dict[str, set] = {}  # document_id -> live labels
+
+    def __len__(self) -> int:
+        return len(self._chunks)
+
+    def _take_labels(self, count: int) -> np.ndarray:
+        """Hand out ``count`` labels, reusing freed ones first (caller holds the write lock)."""
+        reused = self._free_labels[-count:] if count else []
+        del self._free_labels[len(self._free_labels) - len(reused):]
+        fresh = count - len(reused)
+
+        # Every label ever handed out keeps a slot in the global graph and a
+        # rerank row, so both are sized by the next fresh label
+        needed = self._next_label + fresh
+        capacity = 0 if self._vectors is None else len(self._vectors)
+        if needed > capacity:
+            capacity = max(needed, 2 * capacity, ANN_INITIAL_CAPACITY)
+            self._vectors = self._allocate_vectors(capacity)
+            if self._index is None:
+                self._index = _new_graph(self._dim, capacity)
+            else:
+                self._index.resize_index(capacity)
+
+        labels = np.array(reused + list(range(self._next_label, needed)), dtype=np.int64)
+        self._next_label = needed
+        return labels
+
+    def _allocate_vectors(self, capacity: int) -> np.ndarray:
+        """Grow the rerank matrix to ``capacity`` rows, keeping existing rows."""
+        if self._vectors_file is None:
+            vectors = np.zeros((capacity, self._dim), dtype=ANN_VECTOR_DTYPE)
+            if self._vectors is not None:
+                vectors[:len(self._vectors)] = self._vectors
+            return vectors
+
+        # Extending the file keeps its contents, so the new mapping already
+        # holds every existing row
+        self._vectors = None
+        self._vectors_file.truncate(capacity * self._dim * np.dtype(ANN_VECTOR_DTYPE).itemsize)
+        return np.memmap(self._vectors_file, dtype=ANN_VECTOR_DTYPE, mode="r+", shape=(capacity, self._dim))
+
+    def _partition(self, document_id: str, labels: Sequence[int]) -> hnswlib.Index:
+        """Get a document's graph with room for ``labels``, creating it if needed."""
+        slots = self._partition_slots.setdefault(document_id, set())
+        # Labels already holding a (tombstoned) slot are revived in place
+        slots.update(labels)
+        index = self._partitions.get(document_id)
+        if index is None:
+            index = self._partitions[document_id] = _new_graph(
+                self._dim, max(ANN_PARTITION_MIN_CAPACITY, len(slots))
+            )
+        elif len(slots) > index.get_max_elements():
+            index.resize_index(max(len(slots), 2 * index.get_max_elements()))
+        return index
+
+    def _remove_labels(self, labels: Sequence[int]) -> None:
+        """Tombstone replaced chunks and free their labels (caller holds the write lock)."""
+        for label in labels:
+            chunk = self._chunks.pop(label)
+            del self._labels[chunk.chunk_id]
+            self._doc_labels[chunk.document_id].discard(label)
+            self._index.mark_deleted(label)
+            self._partitions[chunk.document_id].mark_deleted(label)
+        self._free_labels.extend(labels)
+
+    def add(self, chunks: List[DocumentChunk], embeddings: Sequence[Sequence[float]]) -> None:
+        """
+        Add chunks with their embeddings, replacing any with the same ID.
+
+        Args:
+            chunks: Chunks to index
+            embeddings: Embeddings aligned with ``chunks``
+        """
+        if not chunks:
+            return
+
+        vectors = _normalize(np.asarray(embeddings, dtype=np.float32))
+        with self._lock.write():
+            if self._dim is None:
+                self._dim = vectors.shape[1]
+
+            replaced = [self._labels[chunk.chunk_id] for chunk in chunks if chunk.chunk_id in self._labels]
+            if replaced:
+                self._remove_labels(replaced)
+
+            labels = self._take_labels(len(chunks))
+            self._vectors[labels] = vectors
+            self._index.add_items(vectors, labels)
+
+            # Group rows by document so each partition takes one add_items call
+            rows_by_doc: Dict[str, List[int]] = {}
+            for row, chunk in enumerate(chunks):
+                rows_by_doc.setdefault(chunk.document_id, []).append(row)
+            for document_id, rows in rows_by_doc.items():
+                self._partition(document_id, labels[rows].tolist()).add_items(vectors[rows], labels[rows])
+
+            for label, chunk in zip(labels.tolist(), chunks):
+                self._labels[chunk.chunk_id] = label
+                self._chunks[label] = chunk
+                self._doc_labels.setdefault(chunk.document_id, set()).add(label)
+
+    def delete_documents(self, document_ids: Sequence[str]) -> None:
+        """
+        Remove every chunk of the given documents.
+
+        Args:
+            document_ids: Documents to remove
+        """
+        with self._lock.write():
+            for document_id in document_ids:
+                self._partitions.pop(document_id, None)
+                self._partition_slots.pop(document_id, None)
+                labels = self._doc_labels.pop(document_id, ())
+                for label in labels:
+                    del self._labels[self._chunks.pop(label).chunk_id]
+                    self._index.mark_deleted(label)
+                self._free_labels.extend(labels)
+
+    def search(
+        self,
+        query_embedding: Sequence[float],
+        k: int,
+        document_id: Optional[str] = None
+    ) -> List[Tuple[DocumentChunk, float]]:
+        """
+        Find the chunks nearest to a query embedding.
+
+        A document-restricted query searches only that document's partition;
+        otherwise the global graph is searched. The graph search over-fetches
+        candidates, which are then reranked by exact cosine similarity in one
+        matrix-vector product. Searches share the lock, so concurrent queries
+        run in parallel.
+
+        Args:
+            query_embedding: Embedded query
+            k: Number of results to return
+            document_id: Restrict results to this document
+
+        Returns:
+            List of (DocumentChunk, relevance score), best first, where the
+            score is cosine similarity
+        """
+        query = _normalize(np.asarray(query_embedding, dtype=np.float32))
+        with self._lock.read():
+            if document_id is None:
+                graph = self._index
+                live = len(self._chunks)
+            else:
+                graph = self._partitions.get(document_id)
+                live = len(self._doc_labels.get(document_id, ()))
+
+            fetch = min(k * ANN_RERANK_OVERSAMPLE, live)
+            if graph is None or fetch <= 0:
+                return []
+            labels = graph.knn_query(query, k=fetch)[0][0]
+
+            scores = self._vectors[labels].astype(np.float32) @ query
+            k = min(k, len(labels))
+            if len(labels) > k:
+                top = np.argpartition(-scores, k - 1)[:k]
+            else:
+                top = np.arange(len(labels))
+            top = top[np.argsort(-scores[top])]
+
+            return [
+                (self._chunks[label], score)
+                for label, score in zip(labels[top].tolist(), scores[top].tolist())
+            ]
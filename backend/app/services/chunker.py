@@ -1,16 +1,35 @@
 """Intelligent text chunking with metadata preservation."""
 import logging
-from typing import List, Dict, Any
-from dataclasses import dataclass, asdict
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from app.services.pdf_processor import TextSegment
+import re
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import List, Dict, Any, Sequence, Tuple
+from dataclasses import dataclass, asdict, field, replace
+from app.models.segments import TextSegment
 from app.config import settings
+from app.utils.process_pool import discard_process_pool, get_process_pool
 import uuid
 
 logger = logging.getLogger(__name__)
 
+# Below this many segments, process start-up and pickling cost more than
+# chunking serially
+PARALLEL_MIN_SEGMENTS = 64
 
-@dataclass
+# Per-process chunkers used by pool workers, keyed by (chunk_size, chunk_overlap)
+_worker_chunkers: Dict[Tuple[int, int], "IntelligentChunker"] = {}
+
+
+def _split_segment_text(text: str, chunk_size: int, chunk_overlap: int) -> List[Tuple[str, int]]:
+    """Split one segment's text in a pool worker, reusing a process-local chunker."""
+    key = (chunk_size, chunk_overlap)
+    chunker = _worker_chunkers.get(key)
+    if chunker is None:
+        chunker = _worker_chunkers[key] = IntelligentChunker(chunk_size, chunk_overlap)
+    return chunker.split_text_with_offsets(text)
+
+
+@dataclass(slots=True, frozen=True)
 class DocumentChunk:
     """A chunk of text with preserved metadata for citations."""
     chunk_id: str
@@ -20,16 +39,76 @@ class DocumentChunk:
     char_end: int
     document_id: str
     chunk_index: int  # Order within the document
-    metadata: Dict[str, Any]
+    filename: str = ""
 
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for storage."""
         return asdict(self)
 
 
+@dataclass(slots=True)
+class ChunkBatch:
+    """Chunks of one document in columnar form, ready for vector store insertion."""
+    document_id: str
+    filename: str
+    ids: List[str] = field(default_factory=list)
+    texts: List[str] = field(default_factory=list)
+    pages: List[int] = field(default_factory=list)
+    char_starts: List[int] = field(default_factory=list)
+    char_ends: List[int] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def select(self, rows: Sequence[int]) -> "ChunkBatch":
+        """Return a batch holding only the given rows, in order."""
+        # map() over each column's __getitem__ gathers the rows in C
+        return ChunkBatch(
+            self.document_id,
+            self.filename,
+            *(
+                list(map(column.__getitem__, rows))
+                for column in (self.ids, self.texts, self.pages, self.char_starts, self.char_ends)
+            )
+        )
+
+    def metadatas(self) -> List[Dict[str, Any]]:
+        """Build the vector store metadata for every chunk in the batch."""
+        base = {"filename": self.filename, "document_id": self.document_id}
+        return [
+            base | {"page": page, "char_start": start, "char_end": end, "chunk_id": chunk_id}
+            for chunk_id, page, start, end in zip(self.ids, self.pages, self.char_starts, self.char_ends)
+        ]
+
+    def to_chunks(self) -> List[DocumentChunk]:
+        """Expand the batch into DocumentChunk objects."""
+        document_id, filename = self.document_id, self.filename
+        # Positional arguments in field order: chunk_id, text, page_number,
+        # char_start, char_end, document_id, chunk_index, filename
+        return [
+            DocumentChunk(chunk_id, text, page, start, end, document_id, index, filename)
+            for index, (chunk_id, text, page, start, end) in enumerate(
+                zip(self.ids, self.texts, self.pages, self.char_starts, self.char_ends)
+            )
+        ]
+
+
 class IntelligentChunker:
     """Chunk documents while preserving citation metadata."""
 
+    # Preferred split points, highest priority first
+    SEPARATORS = (
+        "\n\n",  # Paragraph breaks
+        "\n",    # Line breaks
+        ". ",    # Sentences
+        " ",     # Words
+    )
+
+    # Single pass over all separators; C regex engine does the scanning
+    _SEP_RE = re.compile(r"(\n\n|\n|\. | )")
+    # Word boundaries used to snap the start of an overlap window
+    _WORD_BREAK_RE = re.compile(r"\s+")
+
     def __init__(
         self,
         chunk_size: int = None,
@@ -45,85 +124,172 @@ class IntelligentChunker:
         self.chunk_size = chunk_size or settings.chunk_size
         self.chunk_overlap = chunk_overlap or settings.chunk_overlap
 
-        # Use LangChain's recursive splitter for intelligent chunking
-        self.splitter = RecursiveCharacterTextSplitter(
-            chunk_size=self.chunk_size,
-            chunk_overlap=self.chunk_overlap,
-            length_function=len,
-            separators=[
-                "\n\n",  # Paragraph breaks
-                "\n",    # Line breaks
-                ". ",    # Sentences
-                " ",     # Words
-                ""       # Characters
-            ]
-        )
+    def _find_break(self, text: str, start: int, limit: int) -> int:
+        """
+        Find the best position to end a chunk that starts at ``start``.
 
-    def chunk_segments(
+        Scans ``text[start:limit]`` once and picks the last occurrence of the
+        highest-priority separator (paragraph > line > sentence > word).
+        Falls back to a hard cut at ``limit`` if there is no separator.
+        """
+        last_match = {}
+        for match in self._SEP_RE.finditer(text, start, limit):
+            last_match[match.group()] = match
+
+        for separator in self.SEPARATORS:
+            match = last_match.get(separator)
+            if match is None:
+                continue
+            # Keep the period with its sentence; drop whitespace separators
+            end = match.start() + 1 if separator == ". " else match.start()
+            if end > start:
+                return end
+
+        return limit
+
+    def split_text_with_offsets(self, text: str) -> List[Tuple[str, int]]:
+        """
+        Split text into chunks of at most ``chunk_size`` characters.
+
+        Consecutive chunks overlap by up to ``chunk_overlap`` characters,
+        with the overlap snapped to a word boundary.
+
+        Args:
+            text: Text to split
+
+        Returns:
+            List of (chunk_text, start_offset) tuples, where start_offset is
+            the chunk's position within ``text``
+        """
+        spans = []
+        length = len(text)
+        start = 0
+
+        while start < length:
+            limit = start + self.chunk_size
+            end = length if limit >= length else self._find_break(text, start, limit)
+
+            # Trim surrounding whitespace without copying the text
+            chunk_start, chunk_end = start, end
+            while chunk_start < chunk_end and text[chunk_start].isspace():
+                chunk_start += 1
+            while chunk_end > chunk_start and text[chunk_end - 1].isspace():
+                chunk_end -= 1
+            if chunk_end > chunk_start:
+                spans.append((text[chunk_start:chunk_end], chunk_start))
+
+            if end >= length:
+                break
+
+            # Start the next chunk inside this one, at the next word boundary
+            next_start = end - self.chunk_overlap
+            if next_start > start:
+                word_break = self._WORD_BREAK_RE.search(text, next_start, end)
+                if word_break:
+                    next_start = word_break.end()
+            start = next_start if start < next_start < end else end
+
+        return spans
+
+    def split_text(self, text: str) -> List[str]:
+        """
+        Split text into overlapping chunks.
+
+        Args:
+            text: Text to split
+
+        Returns:
+            List of chunk texts
+        """
+        return [chunk_text for chunk_text, _ in self.split_text_with_offsets(text)]
+
+    def _split_segments(self, segments: List[TextSegment]) -> List[List[Tuple[str, int]]]:
+        """
+        Split every segment, in parallel across processes for large documents.
+
+        Returns:
+            Per-segment lists of (chunk_text, start_offset), in segment order
+        """
+        if len(segments) >= PARALLEL_MIN_SEGMENTS:
+            split = partial(
+                _split_segment_text,
+                chunk_size=self.chunk_size,
+                chunk_overlap=self.chunk_overlap
+            )
+            pool = get_process_pool()
+            try:
+                return list(pool.map(
+                    split,
+                    (segment.text for segment in segments),
+                    chunksize=4
+                ))
+            except (BrokenProcessPool, OSError) as e:
+                logger.warning(f"Parallel chunking unavailable, falling back to serial: {e}")
+                if isinstance(e, BrokenProcessPool):
+                    discard_process_pool(pool)
+
+        return [self.split_text_with_offsets(segment.text) for segment in segments]
+
+    def chunk_segments_columnar(
         self,
         segments: List[TextSegment],
         document_id: str,
-        filename: str
-    ) -> List[DocumentChunk]:
+        filename: str,
+        start_index: int = 0
+    ) -> ChunkBatch:
         """
-        Chunk text segments while preserving position metadata.
+        Chunk text segments into a columnar batch with position metadata.
 
         Args:
             segments: List of text segments from PDF processor
             document_id: Unique identifier for the document
             filename: Original filename
+            start_index: Number of chunks already created for this document,
+                so chunk IDs continue across windows of a streamed document
 
         Returns:
-            List of DocumentChunks with preserved metadata
+            ChunkBatch with one entry per chunk, in document order
         """
-        chunks = []
-        chunk_index = 0
-
-        for segment in segments:
-            # Split the segment text into chunks
-            segment_chunks = self.splitter.split_text(segment.text)
+        batch = ChunkBatch(document_id=document_id, filename=filename)
+        ids, texts, pages = batch.ids, batch.texts, batch.pages
+        char_starts, char_ends = batch.char_starts, batch.char_ends
 
-            # Track position within the segment
-            segment_char_offset = 0
+        # Split the segment texts into chunks, with offsets within each segment.
+        # Chunks are numbered here, in order, so chunk IDs stay deterministic.
+        split_segments = self._split_segments(segments)
 
-            for chunk_text in segment_chunks:
+        for segment, segment_chunks in zip(segments, split_segments):
+            for chunk_text, segment_char_offset in segment_chunks:
                 # Calculate absolute position
                 absolute_char_start = segment.char_start + segment_char_offset
-                absolute_char_end = absolute_char_start + len(chunk_text)
-
-                # Create chunk with full metadata
-                chunk = DocumentChunk(
-                    chunk_id=f"{document_id}_chunk_{chunk_index}",
-                    text=chunk_text,
-                    page_number=segment.page_number,
-                    char_start=absolute_char_start,
-                    char_end=absolute_char_end,
-                    document_id=document_id,
-                    chunk_index=chunk_index,
-                    metadata={
-                        "filename": filename,
-                        "document_id": document_id,
-                        "page": segment.page_number,
-                        "char_start": absolute_char_start,
-                        "char_end": absolute_char_end,
-                        "chunk_id": f"{document_id}_chunk_{chunk_index}"
-                    }
-                )
 
-                chunks.append(chunk)
-                chunk_index += 1
+                ids.append(f"{document_id}_chunk_{start_index + len(ids)}")
+                texts.append(chunk_text)
+                pages.append(segment.page_number)
+                char_starts.append(absolute_char_start)
+                char_ends.append(absolute_char_start + len(chunk_text))
+
+        logger.info(f"Created {len(batch)} chunks from {len(segments)} segments")
+        return batch
 
-                # Update offset for next chunk in this segment
-                # Find where this chunk appears in the original segment text
-                chunk_position = segment.text[segment_char_offset:].find(chunk_text)
-                if chunk_position != -1:
-                    segment_char_offset += chunk_position + len(chunk_text)
-                else:
-                    # Fallback if exact match not found (shouldn't happen)
-                    segment_char_offset += len(chunk_text)
+    def chunk_segments(
+        self,
+        segments: List[TextSegment],
+        document_id: str,
+        filename: str
+    ) -> List[DocumentChunk]:
+        """
+        Chunk text segments while preserving position metadata.
+
+        Args:
+            segments: List of text segments from PDF processor
+            document_id: Unique identifier for the document
+            filename: Original filename
 
-        logger.info(f"Created {len(chunks)} chunks from {len(segments)} segments")
-        return chunks
+        Returns:
+            List of DocumentChunks with preserved metadata
+        """
+        return self.chunk_segments_columnar(segments, document_id, filename).to_chunks()
 
     def merge_overlapping_chunks(self, chunks: List[DocumentChunk]) -> List[DocumentChunk]:
         """
@@ -142,26 +308,41 @@ class IntelligentChunker:
         sorted_chunks = sorted(chunks, key=lambda c: (c.page_number, c.char_start))
 
         merged = [sorted_chunks[0]]
+        # Text fragments and end offset of merged[-1]; chunks are frozen, so
+        # a merged chunk is rebuilt once when it is complete
+        parts = [sorted_chunks[0].text]
+        last_end = sorted_chunks[0].char_end
 
         for current_chunk in sorted_chunks[1:]:
             last_merged = merged[-1]
 
-            # Check if chunks overlap significantly (>50% overlap)
+            # Check if chunks overlap significantly (>50% of the shorter chunk)
             if (current_chunk.page_number == last_merged.page_number and
-                current_chunk.char_start < last_merged.char_end):
+                current_chunk.char_start < last_end):
 
                 overlap_start = current_chunk.char_start
-                overlap_end = min(current_chunk.char_end, last_merged.char_end)
+                overlap_end = min(current_chunk.char_end, last_end)
                 overlap_size = overlap_end - overlap_start
+                shorter_len = min(
+                    last_end - last_merged.char_start,
+                    len(current_chunk.text)
+                )
 
                 # If overlap is significant, merge
-                if overlap_size > len(current_chunk.text) * 0.5:
-                    # Extend the last merged chunk
-                    last_merged.text = last_merged.text + current_chunk.text[overlap_size:]
-                    last_merged.char_end = current_chunk.char_end
+                if overlap_size > shorter_len * 0.5:
+                    # Extend the last merged chunk with the non-overlapping tail
+                    parts.append(current_chunk.text[overlap_size:])
+                    last_end = max(last_end, current_chunk.char_end)
                     continue
 
+            if len(parts) > 1:
+                merged[-1] = replace(last_merged, text="".join(parts), char_end=last_end)
             merged.append(current_chunk)
+            parts = [current_chunk.text]
+            last_end = current_chunk.char_end
+
+        if len(parts) > 1:
+            merged[-1] = replace(merged[-1], text="".join(parts), char_end=last_end)
 
         logger.info(f"Merged {len(chunks)} chunks into {len(merged)} chunks")
         return merged
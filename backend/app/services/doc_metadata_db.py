@@ -0,0 +1,108 @@
+"""SQLite store for uploaded document metadata."""
+import logging
+import sqlite3
+import threading
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class DocumentMetadataDB:
+    """Persist per-document metadata so listings don't have to re-read files."""
+
+    def __init__(self, db_path: str = None):
+        """
+        Initialize the metadata database.
+
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        self.db_path = db_path or settings.metadata_db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS documents (
+                document_id TEXT PRIMARY KEY,
+                filename TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                page_count INTEGER NOT NULL,
+                uploaded_at REAL NOT NULL,
+                sha256 TEXT
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_documents_sha256 ON documents (sha256)")
+        self._conn.commit()
+
+    def add(
+        self,
+        document_id: str,
+        filename: str,
+        size: int,
+        page_count: int,
+        uploaded_at: float,
+        sha256: Optional[str] = None
+    ) -> None:
+        """
+        Insert or replace a document's metadata.
+
+        Args:
+            document_id: Document ID
+            filename: Original filename
+            size: File size in bytes
+            page_count: Number of pages
+            uploaded_at: Upload time as a UNIX timestamp
+            sha256: Hex digest of the file contents
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO documents "
+                "(document_id, filename, size, page_count, uploaded_at, sha256) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (document_id, filename, size, page_count, uploaded_at, sha256)
+            )
+            self._conn.commit()
+
+    def get(self, document_id: str) -> Optional[Dict[str, Any]]:
+        """Get one document's metadata, or None if unknown."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM documents WHERE document_id = ?", (document_id,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def find_by_sha256(self, sha256: str) -> Optional[Dict[str, Any]]:
+        """Get the metadata of a document with the given content hash."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM documents WHERE sha256 = ? ORDER BY uploaded_at DESC LIMIT 1", (sha256,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def list_all(self) -> Dict[str, Dict[str, Any]]:
+        """Get all documents' metadata keyed by document ID."""
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM documents").fetchall()
+        return {row["document_id"]: dict(row) for row in rows}
+
+    def delete(self, document_ids: List[str]) -> None:
+        """Delete metadata for the given documents."""
+        if not document_ids:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "DELETE FROM documents WHERE document_id = ?",
+                [(document_id,) for document_id in document_ids]
+            )
+            self._conn.commit()
+
+
+@lru_cache(maxsize=1)
+def get_metadata_db() -> DocumentMetadataDB:
+    """Get the process-wide document metadata database."""
+    return DocumentMetadataDB()
@@ -1,20 +1,199 @@
 """Generic document processing service supporting multiple file formats."""
+import codecs
+import gc
 import logging
-from typing import List, Dict, Any
+import mmap
+import os
+import re
+from contextlib import closing
+from functools import partial
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 from pathlib import Path
-from dataclasses import dataclass
+from app.config import settings
+from app.models.segments import TextSegment
+from app.services.segment_cache import SegmentCache
 
 logger = logging.getLogger(__name__)
 
+# Below this many pages, process start-up costs more than extracting serially
+PARALLEL_MIN_PAGES = 16
 
-@dataclass
-class TextSegment:
-    """Text segment with position information."""
-    text: str
-    page_number: int
-    char_start: int  # Character position within the document
-    char_end: int
-    bbox: tuple  # Bounding box (x0, y0, x1, y1) for potential future use
+# Pages per worker task; each task opens the PDF once for its whole range
+PDF_PAGES_PER_TASK = 8
+
+# Collect garbage this often during layout-aware extraction, keeping RSS
+# flat on long documents
+PDF_GC_EVERY_PAGES = 32
+
+# Bytes fed to the HTML parser per read
+HTML_READ_CHUNK_SIZE = 1 << 16
+
+# Bytes read when quickly validating plain-text formats
+VALIDATE_PROBE_BYTES = 4096
+
+# Spreadsheet rows per segment, bounding memory on very large sheets
+EXCEL_ROWS_PER_SEGMENT = 500
+
+# Paragraph boundary shared by the text extractors
+_PARA_SEP_RE = re.compile('\n\n')
+
+# Same boundary in raw bytes: two line breaks in any newline convention
+_PARA_SEP_BYTES_RE = re.compile(rb'(?:\r\n|\r(?!\n)|\n){2}')
+
+# (page number, page text, page bbox)
+PageText = Tuple[int, str, tuple]
+
+
+def _cell_text(cell: Any) -> str:
+    """Render a spreadsheet cell value, with empty cells as ''."""
+    return '' if cell is None else str(cell)
+
+
+def _normalize_newlines(text: str) -> str:
+    """Translate CRLF and CR line breaks to LF, as text-mode reads do."""
+    if '\r' not in text:
+        return text
+    return text.replace('\r\n', '\n').replace('\r', '\n')
+
+
+def _strip_span(para: str) -> Tuple[str, int]:
+    """
+    Strip a paragraph and report where the stripped text starts.
+
+    Args:
+        para: Paragraph as sliced from the source text
+
+    Returns:
+        (stripped text, count of leading whitespace characters removed)
+    """
+    text = para.lstrip()
+    lead = len(para) - len(text)
+    return text.rstrip(), lead
+
+
+def paragraph_spans(text: str) -> Iterator[Tuple[str, int]]:
+    """
+    Split text into blank-line separated paragraphs with their offsets.
+
+    Paragraphs are sliced lazily between separator matches, so no list of
+    every paragraph is built up front.
+
+    Args:
+        text: Text to split
+
+    Returns:
+        Iterator of (paragraph, start offset within text), including empty
+        paragraphs so callers see every offset
+    """
+    start = 0
+    for match in _PARA_SEP_RE.finditer(text):
+        yield text[start:match.start()], start
+        start = match.end()
+    yield text[start:], start
+
+
+def _read_pdf_page_range(pdf_path: str, start: int, stop: int, fast: bool) -> List[PageText]:
+    """
+    Extract the text of pages [start, stop) (0-based) from a PDF.
+
+    Runs in pool workers as well as in-process, so it only takes picklable
+    arguments and opens the file itself.
+
+    Args:
+        pdf_path: Path to the PDF file
+        start: First page index
+        stop: Index one past the last page
+        fast: Use pypdf instead of the layout-aware pdfplumber
+
+    Returns:
+        List of (page number, text, page bbox) in page order
+    """
+    pages = []
+
+    if fast:
+        from pypdf import PdfReader
+
+        reader = PdfReader(pdf_path)
+        for page_num in range(start, stop):
+            page = reader.pages[page_num]
+            box = page.mediabox
+            pages.append((page_num + 1, page.extract_text() or "", (0, 0, float(box.width), float(box.height))))
+    else:
+        import pdfplumber
+
+        with pdfplumber.open(pdf_path, pages=list(range(start + 1, stop + 1))) as pdf:
+            for i, page in enumerate(pdf.pages, start=1):
+                pages.append((page.page_number, page.extract_text() or "", (0, 0, page.width, page.height)))
+
+                # pdfplumber keeps each page's parsed chars/objects until the
+                # PDF is closed; drop them as soon as the text is taken
+                page.close()
+                if i % PDF_GC_EVERY_PAGES == 0:
+                    gc.collect()
+
+    return pages
+
+
+def _pdf_page_count(pdf_path: str, fast: bool) -> int:
+    """Get a PDF's page count with the same library used for extraction."""
+    if fast:
+        from pypdf import PdfReader
+
+        return len(PdfReader(pdf_path).pages)
+
+    import pdfplumber
+
+    with pdfplumber.open(pdf_path) as pdf:
+        return len(pdf.pages)
+
+
+def read_pdf_pages(pdf_path: str, fast: bool = True) -> Tuple[int, Iterator[PageText]]:
+    """
+    Extract every page's text from a PDF, in parallel for large documents.
+
+    Page ranges are fanned out over the shared process pool and yielded back
+    in page order as each range completes, so callers can assign document
+    character offsets in a single serial pass and start on early pages
+    while later ones are still being extracted.
+
+    Args:
+        pdf_path: Path to the PDF file
+        fast: Use pypdf instead of the layout-aware pdfplumber
+
+    Returns:
+        Tuple of (page count, iterator of (page number, text, page bbox))
+    """
+    page_count = _pdf_page_count(pdf_path, fast)
+
+    def pages() -> Iterator[PageText]:
+        next_page = 0
+
+        if page_count >= PARALLEL_MIN_PAGES:
+            from concurrent.futures.process import BrokenProcessPool
+            from app.utils.process_pool import discard_process_pool, get_process_pool
+
+            starts = range(0, page_count, PDF_PAGES_PER_TASK)
+            stops = [min(start + PDF_PAGES_PER_TASK, page_count) for start in starts]
+            pool = get_process_pool()
+            try:
+                results = pool.map(
+                    partial(_read_pdf_page_range, pdf_path, fast=fast),
+                    starts,
+                    stops
+                )
+                for page_range, stop in zip(results, stops):
+                    yield from page_range
+                    next_page = stop
+            except (BrokenProcessPool, OSError) as e:
+                logger.warning(f"Parallel PDF extraction unavailable, falling back to serial: {e}")
+                if isinstance(e, BrokenProcessPool):
+                    discard_process_pool(pool)
+
+        # Serial path, or whatever the pool didn't finish
+        if next_page < page_count:
+            yield from _read_pdf_page_range(pdf_path, next_page, page_count, fast)
+
+    return page_count, pages()
 
 
 class DocumentProcessor:
@@ -37,7 +216,7 @@ class DocumentProcessor:
 
     def __init__(self):
         """Initialize document processor."""
-        pass
+        self.segment_cache = SegmentCache()
 
     def get_supported_extensions(self) -> List[str]:
         """Get list of supported file extensions."""
@@ -58,88 +237,143 @@ class DocumentProcessor:
         Returns:
             Tuple of (list of TextSegments, document metadata)
         """
+        metadata: Dict[str, Any] = {}
+        segments = list(self.iter_text_segments(file_path, metadata))
+        return segments, metadata
+
+    def iter_text_segments(
+        self,
+        file_path: str,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> Iterator[TextSegment]:
+        """
+        Stream text segments from any supported document format.
+
+        Segments are yielded as the extractor produces them, so callers can
+        chunk and index a large document without holding all of its
+        segments at once.
+
+        Args:
+            file_path: Path to the document file
+            metadata: Optional dict filled in with the document metadata
+                (page_count, total_chars, ...); complete once the iterator
+                is exhausted
+
+        Returns:
+            Iterator of TextSegments in document order
+        """
         ext = Path(file_path).suffix.lower()
+        if ext not in self.SUPPORTED_EXTENSIONS:
+            raise ValueError(f"Unsupported file format: {ext}")
+
+        return self._iter_cached(file_path, ext, metadata if metadata is not None else {})
+
+    def _iter_cached(self, file_path: str, ext: str, metadata: Dict[str, Any]) -> Iterator[TextSegment]:
+        """Stream segments from the segment cache, extracting (and caching) on a miss."""
+        # Identical bytes always extract identically, so re-indexing or
+        # validating then indexing the same file skips the parse
+        cache_key = self._cache_key(file_path, ext)
+        cached = self.segment_cache.load(cache_key)
+        if cached is not None:
+            logger.info(f"Using cached segments for {file_path}")
+            for record in cached:
+                if isinstance(record, TextSegment):
+                    yield record
+                else:
+                    metadata.update(record)
+            return
+
+        # The entry is only committed if extraction runs to completion
+        with self.segment_cache.writer(cache_key) as write:
+            for segment in self._extract_uncached(file_path, ext, metadata):
+                write(segment)
+                yield segment
+            write(metadata)
+
+    def _cache_key(self, file_path: str, ext: str) -> str:
+        """Segment cache key covering the file's bytes, type and extractor."""
+        variant = ext[1:]
+        if ext == '.pdf':
+            variant += "-fast" if settings.pdf_fast_extract else "-precise"
+        return self.segment_cache.key(file_path, variant)
 
+    def _extract_uncached(self, file_path: str, ext: str, metadata: Dict[str, Any]) -> Iterator[TextSegment]:
+        """Run the format-specific extractor for a file."""
         if ext == '.pdf':
-            return self._extract_from_pdf(file_path)
+            return self._extract_from_pdf(file_path, metadata)
         elif ext in ['.docx', '.doc']:
-            return self._extract_from_docx(file_path)
+            return self._extract_from_docx(file_path, metadata)
         elif ext == '.txt':
-            return self._extract_from_txt(file_path)
+            return self._extract_from_txt(file_path, metadata)
         elif ext == '.md':
-            return self._extract_from_markdown(file_path)
+            return self._extract_from_markdown(file_path, metadata)
         elif ext == '.pptx':
-            return self._extract_from_pptx(file_path)
+            return self._extract_from_pptx(file_path, metadata)
         elif ext in ['.xlsx', '.csv']:
-            return self._extract_from_excel(file_path)
+            return self._extract_from_excel(file_path, metadata)
         elif ext in ['.html', '.htm']:
-            return self._extract_from_html(file_path)
+            return self._extract_from_html(file_path, metadata)
         else:
             raise ValueError(f"Unsupported file format: {ext}")
 
-    def _extract_from_pdf(self, pdf_path: str) -> tuple[List[TextSegment], Dict[str, Any]]:
+    def _extract_from_pdf(self, pdf_path: str, metadata: Dict[str, Any]) -> Iterator[TextSegment]:
         """Extract text from PDF with position tracking."""
-        import pdfplumber
-
-        segments = []
-        metadata = {
+        count = 0
+        metadata.update({
             "page_count": 0,
             "total_chars": 0,
             "file_size": Path(pdf_path).stat().st_size,
             "file_type": "pdf"
-        }
+        })
 
         try:
-            with pdfplumber.open(pdf_path) as pdf:
-                metadata["page_count"] = len(pdf.pages)
-                document_char_offset = 0
+            page_count, pages = read_pdf_pages(pdf_path, fast=settings.pdf_fast_extract)
+            metadata["page_count"] = page_count
+            document_char_offset = 0
 
-                for page_num, page in enumerate(pdf.pages, start=1):
-                    page_text = page.extract_text()
+            for page_num, page_text, page_bbox in pages:
+                if not page_text:
+                    logger.warning(f"No text found on page {page_num}")
+                    continue
 
-                    if not page_text:
-                        logger.warning(f"No text found on page {page_num}")
+                # Create segments based on paragraphs
+                for para, start in paragraph_spans(page_text):
+                    text, lead = _strip_span(para)
+                    n = len(text)
+                    if not n:
                         continue
+                    char_start = document_char_offset + start + lead
+                    count += 1
+                    yield TextSegment(
+                        text=text,
+                        page_number=page_num,
+                        char_start=char_start,
+                        char_end=char_start + n,
+                        bbox=page_bbox
+                    )
 
-                    # Create segments based on paragraphs
-                    paragraphs = page_text.split('\n\n')
-                    page_char_offset = 0
-
-                    for para in paragraphs:
-                        if para.strip():
-                            segment = TextSegment(
-                                text=para.strip(),
-                                page_number=page_num,
-                                char_start=document_char_offset + page_char_offset,
-                                char_end=document_char_offset + page_char_offset + len(para),
-                                bbox=(0, 0, page.width, page.height)
-                            )
-                            segments.append(segment)
-
-                        page_char_offset += len(para) + 2  # +2 for '\n\n'
-
-                    metadata["total_chars"] += len(page_text)
-                    document_char_offset += len(page_text)
+                page_len = len(page_text)
+                metadata["total_chars"] += page_len
+                document_char_offset += page_len
 
-                logger.info(f"Extracted {len(segments)} segments from {metadata['page_count']} pages (PDF)")
+            logger.info(f"Extracted {count} segments from {metadata['page_count']} pages (PDF)")
 
         except Exception as e:
             logger.error(f"Error processing PDF {pdf_path}: {e}")
             raise
 
-        return segments, metadata
 
-    def _extract_from_docx(self, docx_path: str) -> tuple[List[TextSegment], Dict[str, Any]]:
+    def _extract_from_docx(self, docx_path: str, metadata: Dict[str, Any]) -> Iterator[TextSegment]:
         """Extract text from DOCX file."""
         from docx import Document
 
-        segments = []
-        metadata = {
+        count = 0
+        metadata.update({
             "page_count": 1,  # DOCX doesn't have explicit page concept
             "total_chars": 0,
             "file_size": Path(docx_path).stat().st_size,
             "file_type": "docx"
-        }
+        })
 
         try:
             doc = Document(docx_path)
@@ -148,133 +382,135 @@ class DocumentProcessor:
             for para_idx, paragraph in enumerate(doc.paragraphs):
                 text = paragraph.text.strip()
                 if text:
-                    segment = TextSegment(
+                    count += 1
+                    yield TextSegment(
                         text=text,
                         page_number=1,  # All on "page 1" for DOCX
                         char_start=document_char_offset,
                         char_end=document_char_offset + len(text),
                         bbox=(0, 0, 0, 0)
                     )
-                    segments.append(segment)
                     document_char_offset += len(text) + 2
 
             metadata["total_chars"] = document_char_offset
-            logger.info(f"Extracted {len(segments)} paragraphs from DOCX")
+            logger.info(f"Extracted {count} paragraphs from DOCX")
 
         except Exception as e:
             logger.error(f"Error processing DOCX {docx_path}: {e}")
             raise
 
-        return segments, metadata
 
-    def _extract_from_txt(self, txt_path: str) -> tuple[List[TextSegment], Dict[str, Any]]:
+    def _extract_from_txt(self, txt_path: str, metadata: Dict[str, Any]) -> Iterator[TextSegment]:
         """Extract text from plain text file."""
-        segments = []
-        metadata = {
+        count = 0
+        metadata.update({
             "page_count": 1,
             "total_chars": 0,
             "file_size": Path(txt_path).stat().st_size,
             "file_type": "txt"
-        }
+        })
 
         try:
-            with open(txt_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-
             # Split by double newlines (paragraphs)
-            paragraphs = content.split('\n\n')
-            document_char_offset = 0
-
-            for para in paragraphs:
-                text = para.strip()
-                if text:
-                    segment = TextSegment(
-                        text=text,
-                        page_number=1,
-                        char_start=document_char_offset,
-                        char_end=document_char_offset + len(text),
-                        bbox=(0, 0, 0, 0)
-                    )
-                    segments.append(segment)
-                    document_char_offset += len(para) + 2
-
-            metadata["total_chars"] = len(content)
-            logger.info(f"Extracted {len(segments)} paragraphs from TXT")
+            for segment in self._iter_paragraphs_mapped(txt_path, metadata):
+                count += 1
+                yield segment
+            logger.info(f"Extracted {count} paragraphs from TXT")
 
         except Exception as e:
             logger.error(f"Error processing TXT {txt_path}: {e}")
             raise
 
-        return segments, metadata
 
-    def _extract_from_markdown(self, md_path: str) -> tuple[List[TextSegment], Dict[str, Any]]:
-        """Extract text from Markdown file."""
-        import markdown
-        from html.parser import HTMLParser
+    def _iter_paragraphs_mapped(self, file_path: str, metadata: Dict[str, Any]) -> Iterator[TextSegment]:
+        """
+        Split a UTF-8 text file into paragraph segments via a memory map.
 
-        class HTMLTextExtractor(HTMLParser):
-            def __init__(self):
-                super().__init__()
-                self.text_parts = []
+        The file is scanned for blank lines as bytes and each paragraph is
+        decoded on its own, so the whole file is never held as both bytes
+        and str; the OS pages content in as the scan advances. Newlines are
+        normalized as text-mode reading would, keeping offsets in characters.
+
+        Args:
+            file_path: Path to the text file
+            metadata: Document metadata; total_chars is set once the file
+                has been fully read
+
+        Returns:
+            Iterator of paragraph segments
+        """
+        char_offset = 0
+
+        with open(file_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                metadata["total_chars"] = 0
+                return
+
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                byte_start = 0
+                matches = _PARA_SEP_BYTES_RE.finditer(mm)
+                try:
+                    while True:
+                        match = next(matches, None)
+                        byte_end = match.start() if match else len(mm)
+
+                        para = _normalize_newlines(mm[byte_start:byte_end].decode('utf-8'))
+                        text, lead = _strip_span(para)
+                        n = len(text)
+                        if n:
+                            yield TextSegment(
+                                text=text,
+                                page_number=1,
+                                char_start=char_offset + lead,
+                                char_end=char_offset + lead + n,
+                                bbox=(0, 0, 0, 0)
+                            )
+
+                        char_offset += len(para)
+                        if match is None:
+                            break
+                        char_offset += 2  # +2 for '\n\n'
+                        byte_start = match.end()
+                finally:
+                    # Release the regex's hold on the map so it can be closed,
+                    # even if the consumer stops early
+                    match = matches = None
 
-            def handle_data(self, data):
-                self.text_parts.append(data)
+        metadata["total_chars"] = char_offset
 
-        segments = []
-        metadata = {
+    def _extract_from_markdown(self, md_path: str, metadata: Dict[str, Any]) -> Iterator[TextSegment]:
+        """Extract text from Markdown file."""
+        count = 0
+        metadata.update({
             "page_count": 1,
             "total_chars": 0,
             "file_size": Path(md_path).stat().st_size,
             "file_type": "markdown"
-        }
+        })
 
         try:
-            with open(md_path, 'r', encoding='utf-8') as f:
-                md_content = f.read()
-
-            # Convert markdown to HTML, then extract plain text
-            html = markdown.markdown(md_content)
-            extractor = HTMLTextExtractor()
-            extractor.feed(html)
-            text = ' '.join(extractor.text_parts)
-
-            # Also use raw markdown split by sections
-            paragraphs = md_content.split('\n\n')
-            document_char_offset = 0
-
-            for para in paragraphs:
-                text = para.strip()
-                if text:
-                    segment = TextSegment(
-                        text=text,
-                        page_number=1,
-                        char_start=document_char_offset,
-                        char_end=document_char_offset + len(text),
-                        bbox=(0, 0, 0, 0)
-                    )
-                    segments.append(segment)
-                    document_char_offset += len(para) + 2
-
-            metadata["total_chars"] = len(md_content)
-            logger.info(f"Extracted {len(segments)} sections from Markdown")
+            # Split raw markdown by sections
+            for segment in self._iter_paragraphs_mapped(md_path, metadata):
+                count += 1
+                yield segment
+            logger.info(f"Extracted {count} sections from Markdown")
 
         except Exception as e:
             logger.error(f"Error processing Markdown {md_path}: {e}")
             raise
 
-        return segments, metadata
 
-    def _extract_from_pptx(self, pptx_path: str) -> tuple[List[TextSegment], Dict[str, Any]]:
+    def _extract_from_pptx(self, pptx_path: str, metadata: Dict[str, Any]) -> Iterator[TextSegment]:
         """Extract text from PowerPoint file."""
         from pptx import Presentation
 
-        segments = []
-        metadata = {
+        count = 0
+        metadata.update({
             "page_count": 0,
             "total_chars": 0,
             "file_size": Path(pptx_path).stat().st_size,
             "file_type": "pptx"
-        }
+        })
 
         try:
             prs = Presentation(pptx_path)
@@ -293,158 +529,209 @@ class DocumentProcessor:
                 combined_text = '\n'.join(slide_text).strip()
 
                 if combined_text:
-                    segment = TextSegment(
+                    count += 1
+                    yield TextSegment(
                         text=combined_text,
                         page_number=slide_num,
                         char_start=document_char_offset,
                         char_end=document_char_offset + len(combined_text),
                         bbox=(0, 0, 0, 0)
                     )
-                    segments.append(segment)
                     document_char_offset += len(combined_text) + 2
 
             metadata["total_chars"] = document_char_offset
-            logger.info(f"Extracted {len(segments)} slides from PPTX")
+            logger.info(f"Extracted {count} slides from PPTX")
 
         except Exception as e:
             logger.error(f"Error processing PPTX {pptx_path}: {e}")
             raise
 
-        return segments, metadata
 
-    def _extract_from_excel(self, excel_path: str) -> tuple[List[TextSegment], Dict[str, Any]]:
+    def _extract_from_excel(self, excel_path: str, metadata: Dict[str, Any]) -> Iterator[TextSegment]:
         """Extract text from Excel file."""
-        import openpyxl
         import csv
 
-        segments = []
+        count = 0
         ext = Path(excel_path).suffix.lower()
 
-        metadata = {
+        metadata.update({
             "page_count": 0,
             "total_chars": 0,
             "file_size": Path(excel_path).stat().st_size,
             "file_type": ext[1:]  # Remove the dot
-        }
+        })
+
+        document_char_offset = 0
+
+        def make_segment(text: str, page_number: int) -> TextSegment:
+            nonlocal document_char_offset, count
+            segment = TextSegment(
+                text=text,
+                page_number=page_number,
+                char_start=document_char_offset,
+                char_end=document_char_offset + len(text),
+                bbox=(0, 0, 0, 0)
+            )
+            document_char_offset += len(text) + 2
+            count += 1
+            return segment
 
         try:
-            document_char_offset = 0
-
             if ext == '.xlsx':
-                wb = openpyxl.load_workbook(excel_path, read_only=True)
-                metadata["page_count"] = len(wb.sheetnames)
-
-                for sheet_num, sheet_name in enumerate(wb.sheetnames, start=1):
-                    sheet = wb[sheet_name]
-                    rows = []
-
-                    for row in sheet.iter_rows(values_only=True):
-                        row_text = ' | '.join([str(cell) if cell is not None else '' for cell in row])
-                        if row_text.strip():
-                            rows.append(row_text)
-
-                    if rows:
-                        combined_text = '\n'.join(rows)
-                        segment = TextSegment(
-                            text=f"Sheet: {sheet_name}\n{combined_text}",
-                            page_number=sheet_num,
-                            char_start=document_char_offset,
-                            char_end=document_char_offset + len(combined_text),
-                            bbox=(0, 0, 0, 0)
-                        )
-                        segments.append(segment)
-                        document_char_offset += len(combined_text) + 2
+                import openpyxl
+
+                # data_only: cached formula results rather than formula strings
+                wb = openpyxl.load_workbook(excel_path, read_only=True, data_only=True)
+                try:
+                    metadata["page_count"] = len(wb.worksheets)
+
+                    for sheet_num, sheet in enumerate(wb.worksheets, start=1):
+                        sheet_name = sheet.title
+                        header = f"Sheet: {sheet_name}\n"
+                        rows = []
+
+                        # Emit a segment every EXCEL_ROWS_PER_SEGMENT rows so
+                        # memory is bounded by the batch, not the sheet
+                        for row in sheet.iter_rows(values_only=True):
+                            # Skip blank rows before paying for str() on each cell
+                            if not any(cell is not None for cell in row):
+                                continue
+                            row_text = ' | '.join(map(_cell_text, row))
+                            if row_text.strip():
+                                rows.append(row_text)
+                                if len(rows) == EXCEL_ROWS_PER_SEGMENT:
+                                    yield make_segment(header + '\n'.join(rows), sheet_num)
+                                    rows.clear()
+
+                        if rows:
+                            yield make_segment(header + '\n'.join(rows), sheet_num)
+                finally:
+                    wb.close()
 
             elif ext == '.csv':
                 metadata["page_count"] = 1
-                with open(excel_path, 'r', encoding='utf-8') as f:
+                with open(excel_path, 'r', encoding='utf-8', newline='') as f:
                     reader = csv.reader(f)
                     rows = []
                     for row in reader:
+                        if not any(row):
+                            continue
                         row_text = ' | '.join(row)
                         if row_text.strip():
                             rows.append(row_text)
+                            if len(rows) == EXCEL_ROWS_PER_SEGMENT:
+                                yield make_segment('\n'.join(rows), 1)
+                                rows.clear()
 
                     if rows:
-                        combined_text = '\n'.join(rows)
-                        segment = TextSegment(
-                            text=combined_text,
-                            page_number=1,
-                            char_start=0,
-                            char_end=len(combined_text),
-                            bbox=(0, 0, 0, 0)
-                        )
-                        segments.append(segment)
+                        yield make_segment('\n'.join(rows), 1)
 
             metadata["total_chars"] = document_char_offset
-            logger.info(f"Extracted {len(segments)} sheets/rows from {ext.upper()}")
+            logger.info(f"Extracted {count} sheets/rows from {ext.upper()}")
 
         except Exception as e:
             logger.error(f"Error processing {ext.upper()} {excel_path}: {e}")
             raise
 
-        return segments, metadata
 
-    def _extract_from_html(self, html_path: str) -> tuple[List[TextSegment], Dict[str, Any]]:
+    def _extract_from_html(self, html_path: str, metadata: Dict[str, Any]) -> Iterator[TextSegment]:
         """Extract text from HTML file."""
-        from html.parser import HTMLParser
+        from lxml import etree
+
+        class HTMLTextTarget:
+            """
+            lxml parser target that builds segments as text nodes arrive.
+
+            No element tree is materialized, so memory stays flat however
+            large the file is.
+            """
 
-        class HTMLTextExtractor(HTMLParser):
             def __init__(self):
-                super().__init__()
-                self.text_parts = []
-                self.in_script_or_style = False
-
-            def handle_starttag(self, tag, attrs):
-                if tag in ['script', 'style']:
-                    self.in_script_or_style = True
-
-            def handle_endtag(self, tag):
-                if tag in ['script', 'style']:
-                    self.in_script_or_style = False
-
-            def handle_data(self, data):
-                if not self.in_script_or_style:
-                    text = data.strip()
-                    if text:
-                        self.text_parts.append(text)
-
-        segments = []
-        metadata = {
+                self.segments = []
+                self.document_char_offset = 0
+                self.skip_depth = 0  # Nesting depth inside script/style
+                self.pending = []  # Pieces of the current text node
+
+            def _flush(self):
+                text = ''.join(self.pending).strip()
+                self.pending.clear()
+                if text:
+                    self.segments.append(TextSegment(
+                        text=text,
+                        page_number=1,
+                        char_start=self.document_char_offset,
+                        char_end=self.document_char_offset + len(text),
+                        bbox=(0, 0, 0, 0)
+                    ))
+                    self.document_char_offset += len(text) + 2
+
+            def start(self, tag, attrib):
+                self._flush()
+                if tag in ('script', 'style'):
+                    self.skip_depth += 1
+
+            def end(self, tag):
+                self._flush()
+                if tag in ('script', 'style') and self.skip_depth:
+                    self.skip_depth -= 1
+
+            def data(self, data):
+                if not self.skip_depth:
+                    self.pending.append(data)
+
+            def comment(self, text):
+                self._flush()
+
+            def close(self):
+                self._flush()
+
+        count = 0
+        metadata.update({
             "page_count": 1,
             "total_chars": 0,
             "file_size": Path(html_path).stat().st_size,
             "file_type": "html"
-        }
+        })
 
         try:
-            with open(html_path, 'r', encoding='utf-8') as f:
-                html_content = f.read()
-
-            extractor = HTMLTextExtractor()
-            extractor.feed(html_content)
-
-            document_char_offset = 0
-            for text_part in extractor.text_parts:
-                if text_part:
-                    segment = TextSegment(
-                        text=text_part,
-                        page_number=1,
-                        char_start=document_char_offset,
-                        char_end=document_char_offset + len(text_part),
-                        bbox=(0, 0, 0, 0)
-                    )
-                    segments.append(segment)
-                    document_char_offset += len(text_part) + 2
-
-            metadata["total_chars"] = document_char_offset
-            logger.info(f"Extracted {len(segments)} text blocks from HTML")
+            target = HTMLTextTarget()
+            parser = etree.HTMLParser(target=target, encoding='utf-8', huge_tree=True)
+
+            # Feed the file incrementally instead of reading it whole,
+            # handing on the segments each read completes
+            with open(html_path, 'rb') as f:
+                while chunk := f.read(HTML_READ_CHUNK_SIZE):
+                    parser.feed(chunk)
+                    count += len(target.segments)
+                    yield from target.segments
+                    target.segments.clear()
+            parser.close()
+            count += len(target.segments)
+            yield from target.segments
+
+            metadata["total_chars"] = target.document_char_offset
+            logger.info(f"Extracted {count} text blocks from HTML")
 
         except Exception as e:
             logger.error(f"Error processing HTML {html_path}: {e}")
             raise
 
-        return segments, metadata
+
+    def get_page_count(self, pdf_path: str) -> int:
+        """
+        Get the number of pages in a PDF.
+
+        Args:
+            pdf_path: Path to the PDF file
+
+        Returns:
+            Number of pages
+        """
+        try:
+            return _pdf_page_count(pdf_path, fast=settings.pdf_fast_extract)
+        except Exception as e:
+            logger.error(f"Error getting page count for {pdf_path}: {e}")
+            return 0
 
     def validate_document(self, file_path: str) -> bool:
         """
@@ -459,11 +746,62 @@ class DocumentProcessor:
         try:
             if not self.is_supported(file_path):
                 return False
+            ext = Path(file_path).suffix.lower()
+
+            # A cached extraction already proves the file is readable
+            cached = self.segment_cache.load(self._cache_key(file_path, ext))
+            if cached is not None:
+                with closing(cached):
+                    return isinstance(next(cached, None), TextSegment)
+
+            # Most valid documents show text in their first page or bytes
+            if self._quick_validate(file_path, ext):
+                return True
 
-            # Try to extract text to verify it's valid
+            # Otherwise try a full extraction (and cache it for indexing)
             segments, _ = self.extract_text_with_positions(file_path)
             return len(segments) > 0
 
         except Exception as e:
             logger.error(f"Document validation failed for {file_path}: {e}")
             return False
+
+    def _quick_validate(self, file_path: str, ext: str) -> bool:
+        """
+        Cheaply check whether a document has extractable text.
+
+        Looks only at the first PDF page, the DOCX paragraphs up to the first
+        non-empty one, or the first VALIDATE_PROBE_BYTES of plain-text
+        formats. A False result is inconclusive (e.g. a blank cover page),
+        so callers fall back to a full extraction.
+
+        Args:
+            file_path: Path to the document file
+            ext: Lower-cased file extension
+
+        Returns:
+            True if text was found
+        """
+        if ext == '.pdf':
+            pages = _read_pdf_page_range(file_path, 0, 1, fast=settings.pdf_fast_extract)
+            return any(page_text.strip() for _, page_text, _ in pages)
+
+        if ext in ('.docx', '.doc'):
+            from docx import Document
+
+            return any(paragraph.text.strip() for paragraph in Document(file_path).paragraphs)
+
+        if ext in ('.txt', '.md', '.csv'):
+            with open(file_path, 'rb') as f:
+                probe = f.read(VALIDATE_PROBE_BYTES)
+            # Decode strictly, as extraction does, so binary files fail here.
+            # Unless the probe is the whole file, a multi-byte character cut
+            # at its end is held back by the incremental decoder, not an error.
+            decoder = codecs.getincrementaldecoder('utf-8')()
+            try:
+                text = decoder.decode(probe, final=len(probe) < VALIDATE_PROBE_BYTES)
+            except UnicodeDecodeError:
+                return False
+            return bool(text.strip())
+
+        return False
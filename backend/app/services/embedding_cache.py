@@ -0,0 +1,239 @@
+"""Persistent content-addressed cache for text embeddings."""
+import hashlib
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCache:
+    """SQLite store of embeddings keyed by SHA-256 of the text and model name."""
+
+    # Stay well under SQLite's bound-parameter limit in IN (...) queries
+    _MAX_PARAMS = 500
+
+    # Storage precision of cached vectors. Full precision, so a cache hit
+    # returns exactly what the provider did; compact copies for search are
+    # kept by the in-memory index instead.
+    _VECTOR_DTYPE = "float32"
+
+    def __init__(self, db_path: str = None):
+        """
+        Initialize the cache.
+
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        self.db_path = db_path or settings.embedding_cache_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                sha256 BLOB NOT NULL,
+                model TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                dtype TEXT NOT NULL DEFAULT 'float32',
+                PRIMARY KEY (sha256, model)
+            )
+            """
+        )
+        # Caches created before the dtype column existed hold float32 blobs
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(embeddings)")}
+        if "dtype" not in columns:
+            self._conn.execute("ALTER TABLE embeddings ADD COLUMN dtype TEXT NOT NULL DEFAULT 'float32'")
+        self._conn.commit()
+
+    @staticmethod
+    def text_hash(text: str) -> bytes:
+        """SHA-256 digest used as the cache key for a text."""
+        return hashlib.sha256(text.encode("utf-8")).digest()
+
+    def get_many(self, texts: List[str], model: str) -> List[Optional[List[float]]]:
+        """
+        Look up embeddings for several texts.
+
+        Args:
+            texts: Texts to look up
+            model: Embedding model name (part of the key, so switching
+                models never returns vectors from another model)
+
+        Returns:
+            List aligned with ``texts``; None where there is no cached vector
+        """
+        hashes = [self.text_hash(text) for text in texts]
+        found: Dict[bytes, List[float]] = {}
+
+        with self._lock:
+            for i in range(0, len(hashes), self._MAX_PARAMS):
+                batch = hashes[i:i + self._MAX_PARAMS]
+                placeholders = ",".join("?" * len(batch))
+                # Rows in another precision (half-precision rows from an
+                # earlier version) count as misses and are re-embedded
+                rows = self._conn.execute(
+                    f"SELECT sha256, vector FROM embeddings "
+                    f"WHERE model = ? AND dtype = ? AND sha256 IN ({placeholders})",
+                    [model, self._VECTOR_DTYPE, *batch]
+                ).fetchall()
+                for digest, blob in rows:
+                    found[digest] = np.frombuffer(blob, dtype=self._VECTOR_DTYPE).tolist()
+
+        return [found.get(digest) for digest in hashes]
+
+    def put_many(self, texts: List[str], vectors: List[List[float]], model: str) -> None:
+        """
+        Store embeddings for several texts.
+
+        Args:
+            texts: Embedded texts
+            vectors: Embeddings aligned with ``texts``
+            model: Embedding model name
+        """
+        dtype = self._VECTOR_DTYPE
+        rows = [
+            (self.text_hash(text), model, np.asarray(vector, dtype=dtype).tobytes(), dtype)
+            for text, vector in zip(texts, vectors)
+        ]
+
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (sha256, model, vector, dtype) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            self._conn.commit()
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that only sends uncached texts to the provider.
+
+    Lookups go through a bounded in-memory LRU first, then the persistent
+    SQLite cache, and only then the provider.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        model_name: str,
+        cache: EmbeddingCache = None,
+        batch_size: int = None,
+        memory_size: int = None,
+        concurrency: int = None
+    ):
+        """
+        Wrap an embedding model with a persistent cache.
+
+        Args:
+            embeddings: Underlying LangChain embedding model
+            model_name: Name identifying the model in cache keys
+            cache: Cache to use (defaults to one at settings.embedding_cache_path)
+            batch_size: Maximum texts sent to the provider per request
+            memory_size: Maximum vectors kept in the in-memory LRU
+            concurrency: Maximum provider requests in flight at once
+        """
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.cache = cache or EmbeddingCache()
+        self.batch_size = batch_size or settings.embedding_batch_size
+        self.memory_size = memory_size or settings.embedding_memory_cache_size
+        self.concurrency = concurrency or settings.embedding_concurrency
+        # Keyed by text hash; the wrapper is per model, so the model name
+        # need not be part of the key here
+        self._memory: "OrderedDict[bytes, List[float]]" = OrderedDict()
+        self._memory_lock = threading.Lock()
+
+    def _memory_get(self, key: bytes) -> Optional[List[float]]:
+        """Return a vector from the in-memory LRU, marking it recently used."""
+        with self._memory_lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+            return vector
+
+    def _memory_put(self, key: bytes, vector: List[float]) -> None:
+        """Store a vector in the in-memory LRU, evicting the oldest if full."""
+        with self._memory_lock:
+            self._memory[key] = vector
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
+
+    def _embed_batched(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed texts in provider requests of at most ``batch_size`` texts.
+
+        The requests are I/O-bound, so several are kept in flight at once;
+        settings.embedding_concurrency bounds how many, which also keeps
+        bursts within provider rate limits.
+        """
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        workers = min(self.concurrency, len(batches))
+        if workers <= 1:
+            results = map(self.embeddings.embed_documents, batches)
+            return [vector for batch in results for vector in batch]
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="embed") as executor:
+            # map yields results in submission order, keeping vectors aligned
+            results = executor.map(self.embeddings.embed_documents, batches)
+            return [vector for batch in results for vector in batch]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed documents, serving repeated texts from the caches."""
+        if not texts:
+            return []
+
+        keys = [EmbeddingCache.text_hash(text) for text in texts]
+        vectors = [self._memory_get(key) for key in keys]
+        memory_hits = sum(vector is not None for vector in vectors)
+
+        # Fall back to the persistent cache for texts not held in memory
+        disk_idx = [i for i, vector in enumerate(vectors) if vector is None]
+        if disk_idx:
+            try:
+                stored = self.cache.get_many([texts[i] for i in disk_idx], self.model_name)
+            except sqlite3.Error as e:
+                logger.warning(f"Embedding cache lookup failed: {e}")
+                stored = [None] * len(disk_idx)
+            for i, vector in zip(disk_idx, stored):
+                if vector is not None:
+                    vectors[i] = vector
+                    self._memory_put(keys[i], vector)
+
+        # Embed each distinct missing text once
+        missing = list(dict.fromkeys(text for text, vector in zip(texts, vectors) if vector is None))
+        if missing:
+            new_vectors = self._embed_batched(missing)
+            try:
+                self.cache.put_many(missing, new_vectors, self.model_name)
+            except sqlite3.Error as e:
+                logger.warning(f"Embedding cache write failed: {e}")
+
+            by_text = dict(zip(missing, new_vectors))
+            for i, vector in enumerate(vectors):
+                if vector is None:
+                    vectors[i] = by_text[texts[i]]
+                    self._memory_put(keys[i], vectors[i])
+
+        logger.info(
+            f"Embedded {len(texts)} texts ({memory_hits} from memory, "
+            f"{len(texts) - memory_hits - len(missing)} from disk, {len(missing)} new)"
+        )
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query, serving repeated questions from the in-memory LRU."""
+        # Separate key space: some models embed queries differently
+        key = b"q" + EmbeddingCache.text_hash(text)
+        vector = self._memory_get(key)
+        if vector is None:
+            vector = self.embeddings.embed_query(text)
+            self._memory_put(key, vector)
+        return vector
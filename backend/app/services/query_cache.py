@@ -0,0 +1,166 @@
+"""Semantic cache for answered questions."""
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional
+import numpy as np
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Embedding rows reserved when a scope gets its first entry; doubles as it fills
+SCOPE_INITIAL_ROWS = 64
+
+
+class _ScopeRows:
+    """Unit embeddings of one scope's entries, packed into a contiguous matrix."""
+
+    def __init__(self, dim: int):
+        self.matrix = np.empty((SCOPE_INITIAL_ROWS, dim), dtype=np.float32)
+        self.keys: List[int] = []  # row -> entry key
+
+    def append(self, key: int, vector: np.ndarray) -> int:
+        """Store an entry's embedding and return its row."""
+        row = len(self.keys)
+        if row == len(self.matrix):
+            grown = np.empty((2 * row, self.matrix.shape[1]), dtype=np.float32)
+            grown[:row] = self.matrix
+            self.matrix = grown
+        self.matrix[row] = vector
+        self.keys.append(key)
+        return row
+
+    def remove(self, row: int) -> Optional[int]:
+        """
+        Drop a row by moving the last row into its place.
+
+        Returns:
+            Key of the entry that moved into ``row``, or None if none did
+        """
+        last = len(self.keys) - 1
+        moved = None
+        if row != last:
+            self.matrix[row] = self.matrix[last]
+            moved = self.keys[row] = self.keys[last]
+        self.keys.pop()
+        return moved
+
+
+class SemanticQueryCache:
+    """
+    Cache query responses keyed by question embedding.
+
+    A lookup hits when a previously answered question in the same scope has
+    cosine similarity of at least ``threshold`` with the new one, so
+    rephrasings of the same question skip retrieval and generation entirely.
+    Entries are evicted least-recently-used first.
+    """
+
+    def __init__(self, threshold: float = None, max_entries: int = None):
+        """
+        Initialize the cache.
+
+        Args:
+            threshold: Minimum cosine similarity for a hit
+            max_entries: Maximum number of cached responses
+        """
+        self.threshold = threshold if threshold is not None else settings.semantic_cache_threshold
+        self.max_entries = max_entries if max_entries is not None else settings.semantic_cache_size
+
+        # key -> [scope, row in the scope's matrix, response]; order is LRU -> MRU
+        self._entries: "OrderedDict[int, list]" = OrderedDict()
+        self._scopes: Dict[Hashable, _ScopeRows] = {}
+        self._next_key = 0
+        # Bumped by clear(), so answers computed before it can be told apart
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    @property
+    def generation(self) -> int:
+        """Current cache generation; capture it before computing an answer to add."""
+        return self._generation
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def get(self, embedding: List[float], scope: Hashable = None) -> Optional[Any]:
+        """
+        Look up a cached response for a similar question.
+
+        Args:
+            embedding: Embedding of the incoming question
+            scope: Cache partition (e.g. document ID and citation count);
+                only entries with the same scope can match
+
+        Returns:
+            Cached response, or None on a miss
+        """
+        query = self._normalize(embedding)
+
+        with self._lock:
+            rows = self._scopes.get(scope)
+            if rows is None:
+                return None
+
+            similarities = rows.matrix[:len(rows.keys)] @ query
+            best = int(np.argmax(similarities))
+
+            if similarities[best] < self.threshold:
+                return None
+
+            key = rows.keys[best]
+            self._entries.move_to_end(key)
+            logger.info(f"Semantic cache hit (similarity={similarities[best]:.4f})")
+            return self._entries[key][2]
+
+    def add(
+        self,
+        embedding: List[float],
+        response: Any,
+        scope: Hashable = None,
+        generation: Optional[int] = None
+    ) -> None:
+        """
+        Cache a response.
+
+        Args:
+            embedding: Embedding of the answered question
+            response: Response to return for similar questions
+            scope: Cache partition the entry belongs to
+            generation: Cache generation captured before the response was
+                computed; the response is dropped if the cache has been
+                cleared since, as it may reflect documents that changed
+        """
+        vector = self._normalize(embedding)
+
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            rows = self._scopes.get(scope)
+            if rows is None:
+                rows = self._scopes[scope] = _ScopeRows(len(vector))
+            self._entries[self._next_key] = [scope, rows.append(self._next_key, vector), response]
+            self._next_key += 1
+
+            while len(self._entries) > self.max_entries:
+                self._evict_oldest()
+
+    def _evict_oldest(self) -> None:
+        """Drop the least recently used entry (caller holds the lock)."""
+        _, (scope, row, _) = self._entries.popitem(last=False)
+        rows = self._scopes[scope]
+        moved = rows.remove(row)
+        if moved is not None:
+            self._entries[moved][1] = row
+        if not rows.keys:
+            del self._scopes[scope]
+
+    def clear(self) -> None:
+        """Drop all cached responses (e.g. after documents change)."""
+        with self._lock:
+            self._entries.clear()
+            self._scopes.clear()
+            self._generation += 1
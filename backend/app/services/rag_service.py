@@ -1,16 +1,22 @@
 """RAG (Retrieval Augmented Generation) service with citation tracking."""
+import asyncio
 import logging
 import time
+from functools import lru_cache
+from itertools import islice
 from typing import List, Optional
-from langchain_openai import ChatOpenAI
-from langchain_ollama import ChatOllama
-from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.messages import HumanMessage
 from app.services.vector_store import VectorStore
+from app.services.chunker import DocumentChunk
+from app.services.query_cache import SemanticQueryCache
 from app.models.schemas import Citation, QueryResponse
 from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Segments chunked and indexed per step when streaming a document
+INDEX_WINDOW_SEGMENTS = 256
+
 
 class RAGService:
     """RAG service for question answering with citations."""
@@ -33,12 +39,21 @@ Question: {question}
 
 Provide a short, direct answer in simple English (2-3 sentences maximum). NO citation markers."""
 
+    # The template split around its placeholders once, so each query builds
+    # the prompt with plain concatenation instead of template parsing
+    _PROMPT_PREFIX, _prompt_rest = PROMPT_TEMPLATE.split("{context}", 1)
+    _PROMPT_MIDDLE, _PROMPT_SUFFIX = _prompt_rest.split("{question}", 1)
+    del _prompt_rest
+
     def __init__(self):
         """Initialize RAG service."""
         self.vector_store = VectorStore()
 
-        # Initialize LLM based on provider
+        # Initialize LLM based on provider (only the configured provider's
+        # client library is imported)
         if settings.ai_provider == "ollama":
+            from langchain_ollama import ChatOllama
+
             self.llm = ChatOllama(
                 model=settings.ollama_model,
                 base_url=settings.ollama_base_url,
@@ -48,6 +63,8 @@ Provide a short, direct answer in simple English (2-3 sentences maximum). NO cit
             )
             logger.info(f"RAG service initialized with Ollama model: {settings.ollama_model}")
         else:
+            from langchain_openai import ChatOpenAI
+
             self.llm = ChatOpenAI(
                 openai_api_key=settings.openai_api_key,
                 model=settings.openai_model,
@@ -55,14 +72,129 @@ Provide a short, direct answer in simple English (2-3 sentences maximum). NO cit
             )
             logger.info(f"RAG service initialized with OpenAI model: {settings.openai_model}")
 
-        # Create prompt template
-        self.prompt = ChatPromptTemplate.from_template(self.PROMPT_TEMPLATE)
+        # Answers to similar questions, invalidated whenever documents change
+        self.query_cache = SemanticQueryCache()
+
+        # Caps concurrent LLM generations issued through aquery
+        self._llm_semaphore = asyncio.Semaphore(settings.max_concurrent_llm)
+
+    def embed_question(self, question: str) -> List[float]:
+        """
+        Embed a question with the same model used for retrieval.
+
+        Args:
+            question: Question text
+
+        Returns:
+            Embedding vector
+        """
+        return self.vector_store.embedding_model.embed_query(question)
+
+    def _no_results_response(self, question: str, start_time: float) -> QueryResponse:
+        """Build the response for a question with no relevant chunks."""
+        logger.warning(f"No relevant chunks found for question: {question}")
+        return QueryResponse(
+            answer="I couldn't find any relevant information in the documents to answer this question.",
+            citations=[],
+            question=question,
+            processing_time_ms=(time.time() - start_time) * 1000
+        )
+
+    def _prepare(
+        self,
+        question: str,
+        relevant_chunks: List[tuple[DocumentChunk, float]]
+    ) -> tuple[list, List[Citation]]:
+        """
+        Build the LLM prompt messages and citations from the retrieved chunks.
+
+        Context, citations and the debug log are all produced in one pass,
+        with one preview slice per chunk.
+
+        Args:
+            question: Question to answer
+            relevant_chunks: Retrieved (chunk, score) pairs
+
+        Returns:
+            Tuple of (prompt messages for the LLM, citations)
+        """
+        # Log retrieved chunks for debugging (lazy formatting, skipped
+        # entirely when INFO is disabled)
+        log_chunks = logger.isEnabledFor(logging.INFO)
+        if log_chunks:
+            logger.info("Retrieved chunks for query '%s':", question)
+
+        context_parts = []
+        citations = []
+        for i, (chunk, score) in enumerate(relevant_chunks):
+            text = chunk.text
+            preview = text if len(text) <= 200 else text[:200] + "..."
+
+            if log_chunks:
+                logger.info(
+                    "  Chunk %d: doc_id=%s, page=%s, score=%.4f, text_preview=%.100s...",
+                    i + 1, chunk.document_id, chunk.page_number, score, preview
+                )
+
+            # Just provide the text without source markers - citations are handled separately
+            context_parts.append(f"{text}\n")
+
+            citations.append(Citation(
+                chunk_id=chunk.chunk_id,
+                text=preview,
+                page_number=chunk.page_number,
+                char_start=chunk.char_start,
+                char_end=chunk.char_end,
+                relevance_score=float(score)
+            ))
+
+        context = "\n---\n".join(context_parts)
+
+        logger.info(f"Generating answer for: {question}")
+
+        # Same single human message ChatPromptTemplate.from_template produced
+        messages = [HumanMessage(content=(
+            f"{self._PROMPT_PREFIX}{context}{self._PROMPT_MIDDLE}{question}{self._PROMPT_SUFFIX}"
+        ))]
+        return messages, citations
+
+    def _build_response(
+        self,
+        question: str,
+        answer: str,
+        citations: List[Citation],
+        start_time: float
+    ) -> QueryResponse:
+        """
+        Build the final response.
+
+        Args:
+            question: Question that was answered
+            answer: LLM answer text
+            citations: Citations for the retrieved chunks
+            start_time: time.time() when the query started
+
+        Returns:
+            QueryResponse with answer and citations
+        """
+        # Calculate processing time
+        processing_time = (time.time() - start_time) * 1000
+
+        logger.info(f"Query completed in {processing_time:.2f}ms with {len(citations)} citations")
+
+        return QueryResponse(
+            answer=answer,
+            citations=citations,
+            question=question,
+            processing_time_ms=processing_time
+        )
 
     def query(
         self,
         question: str,
         document_id: Optional[str] = None,
-        max_citations: int = 3  # Optimized for fast, relevant answers
+        max_citations: int = 3,  # Optimized for fast, relevant answers
+        query_embedding: Optional[List[float]] = None
     ) -> QueryResponse:
         """
         Answer a question using RAG with citation tracking.
@@ -71,6 +203,9 @@ Provide a short, direct answer in simple English (2-3 sentences maximum). NO cit
             question: Question to answer
             document_id: Optional specific document to query
             max_citations: Maximum number of citations to return
+            query_embedding: Embedding of ``question`` if the caller already
+                computed one (e.g. for the semantic cache), so it isn't
+                embedded twice
 
         Returns:
             QueryResponse with answer and citations
@@ -84,67 +219,75 @@ Provide a short, direct answer in simple English (2-3 sentences maximum). NO cit
             relevant_chunks = self.vector_store.similarity_search(
                 query=question,
                 k=max_citations,
-                filter_dict=filter_dict
+                filter_dict=filter_dict,
+                query_embedding=query_embedding
             )
 
             if not relevant_chunks:
-                logger.warning(f"No relevant chunks found for question: {question}")
-                return QueryResponse(
-                    answer="I couldn't find any relevant information in the documents to answer this question.",
-                    citations=[],
-                    question=question,
-                    processing_time_ms=(time.time() - start_time) * 1000
-                )
+                return self._no_results_response(question, start_time)
 
-            # Log retrieved chunks for debugging
-            logger.info(f"Retrieved chunks for query '{question}':")
-            for i, (chunk, score) in enumerate(relevant_chunks):
-                logger.info(f"  Chunk {i+1}: doc_id={chunk.document_id}, page={chunk.page_number}, score={score:.4f}, text_preview={chunk.text[:100]}...")
+            # Step 2: Prepare context and citations from retrieved chunks
+            messages, citations = self._prepare(question, relevant_chunks)
 
-            # Step 2: Prepare context from retrieved chunks
-            context_parts = []
-            for chunk, score in relevant_chunks:
-                # Just provide the text without source markers - citations are handled separately
-                context_parts.append(f"{chunk.text}\n")
+            # Step 3: Generate answer using LLM
+            response = self.llm.invoke(messages)
 
-            context = "\n---\n".join(context_parts)
+            return self._build_response(question, response.content, citations, start_time)
 
-            # Step 3: Generate answer using LLM
-            logger.info(f"Generating answer for: {question}")
+        except Exception as e:
+            logger.error(f"Error processing query: {e}", exc_info=True)
+            raise
 
-            messages = self.prompt.format_messages(
-                context=context,
-                question=question
-            )
+    async def aquery(
+        self,
+        question: str,
+        document_id: Optional[str] = None,
+        max_citations: int = 3,
+        query_embedding: Optional[List[float]] = None
+    ) -> QueryResponse:
+        """
+        Answer a question without blocking the event loop.
 
-            response = self.llm.invoke(messages)
-            answer = response.content
-
-            # Step 4: Create citations from retrieved chunks
-            citations = []
-            for chunk, score in relevant_chunks:
-                citation = Citation(
-                    chunk_id=chunk.chunk_id,
-                    text=chunk.text[:200] + "..." if len(chunk.text) > 200 else chunk.text,
-                    page_number=chunk.page_number,
-                    char_start=chunk.char_start,
-                    char_end=chunk.char_end,
-                    relevance_score=float(score)
-                )
-                citations.append(citation)
+        Retrieval runs in a worker thread and the LLM call uses the client's
+        native async API, capped at settings.max_concurrent_llm concurrent
+        generations so a local Ollama server isn't flooded.
 
-            # Calculate processing time
-            processing_time = (time.time() - start_time) * 1000
+        Args:
+            question: Question to answer
+            document_id: Optional specific document to query
+            max_citations: Maximum number of citations to return
+            query_embedding: Embedding of ``question`` if the caller already
+                computed one (e.g. for the semantic cache), so it isn't
+                embedded twice
 
-            logger.info(f"Query completed in {processing_time:.2f}ms with {len(citations)} citations")
+        Returns:
+            QueryResponse with answer and citations
+        """
+        start_time = time.time()
+
+        try:
+            # Step 1: Retrieve relevant chunks with scores
+            filter_dict = {"document_id": document_id} if document_id else None
 
-            return QueryResponse(
-                answer=answer,
-                citations=citations,
-                question=question,
-                processing_time_ms=processing_time
+            relevant_chunks = await self.vector_store.asimilarity_search(
+                query=question,
+                k=max_citations,
+                filter_dict=filter_dict,
+                query_embedding=query_embedding
             )
 
+            if not relevant_chunks:
+                return self._no_results_response(question, start_time)
+
+            # Step 2: Prepare context and citations from retrieved chunks
+            messages, citations = self._prepare(question, relevant_chunks)
+
+            # Step 3: Generate answer using LLM
+            async with self._llm_semaphore:
+                response = await self.llm.ainvoke(messages)
+
+            return self._build_response(question, response.content, citations, start_time)
+
         except Exception as e:
             logger.error(f"Error processing query: {e}", exc_info=True)
             raise
@@ -170,34 +313,107 @@ Provide a short, direct answer in simple English (2-3 sentences maximum). NO cit
         from app.services.chunker import IntelligentChunker
 
         try:
-            # Step 1: Extract text with positions (supports multiple formats)
             doc_processor = DocumentProcessor()
-            segments, metadata = doc_processor.extract_text_with_positions(file_path)
+            chunker = IntelligentChunker()
+            metadata = {}
+            segments_count = 0
+            chunk_count = 0
+
+            # Step 1: Stream text segments with positions (supports multiple formats)
+            segments = doc_processor.iter_text_segments(file_path, metadata)
+
+            # Steps 2-3: Chunk and index each window of segments as it arrives,
+            # so the whole document's segments are never held at once
+            while window := list(islice(segments, INDEX_WINDOW_SEGMENTS)):
+                batch = chunker.chunk_segments_columnar(
+                    window, document_id, filename, start_index=chunk_count
+                )
+                self.vector_store.add_batch(batch)
+                segments_count += len(window)
+                chunk_count += len(batch)
 
-            logger.info(f"Extracted {len(segments)} segments from {filename}")
+            self.query_cache.clear()
+            return self._indexing_stats(document_id, filename, metadata, chunk_count, segments_count)
 
-            # Step 2: Chunk segments with metadata preservation
+        except Exception as e:
+            logger.error(f"Error indexing document {filename}: {e}", exc_info=True)
+            # Don't leave the windows indexed so far behind
+            self.vector_store.delete_document(document_id)
+            self.query_cache.clear()
+            raise
+
+    async def aindex_document(
+        self,
+        document_id: str,
+        filename: str,
+        file_path: str
+    ) -> dict:
+        """
+        Process and index a document without blocking the event loop.
+
+        Extraction and chunking of each window run in worker threads, and the
+        vector store writes it batch by batch, so other requests are served
+        while a large upload is indexed.
+
+        Args:
+            document_id: Unique document identifier
+            filename: Original filename
+            file_path: Path to the document file (any supported format)
+
+        Returns:
+            Dictionary with indexing statistics
+        """
+        from app.services.document_processor import DocumentProcessor
+        from app.services.chunker import IntelligentChunker
+
+        try:
+            doc_processor = DocumentProcessor()
             chunker = IntelligentChunker()
-            chunks = chunker.chunk_segments(segments, document_id, filename)
+            metadata = {}
+            segments_count = 0
+            chunk_count = 0
 
-            logger.info(f"Created {len(chunks)} chunks from {filename}")
+            segments = doc_processor.iter_text_segments(file_path, metadata)
 
-            # Step 3: Add chunks to vector store
-            chunk_ids = self.vector_store.add_chunks(chunks)
+            # The segment generator is only ever advanced by one thread at a time
+            while window := await asyncio.to_thread(list, islice(segments, INDEX_WINDOW_SEGMENTS)):
+                batch = await asyncio.to_thread(
+                    chunker.chunk_segments_columnar, window, document_id, filename, chunk_count
+                )
+                await self.vector_store.add_batch_async(batch)
+                segments_count += len(window)
+                chunk_count += len(batch)
 
-            return {
-                "document_id": document_id,
-                "filename": filename,
-                "page_count": metadata["page_count"],
-                "chunk_count": len(chunks),
-                "segments_count": len(segments),
-                "total_chars": metadata["total_chars"]
-            }
+            self.query_cache.clear()
+            return self._indexing_stats(document_id, filename, metadata, chunk_count, segments_count)
 
         except Exception as e:
             logger.error(f"Error indexing document {filename}: {e}", exc_info=True)
+            # Don't leave the windows indexed so far behind
+            await asyncio.to_thread(self.vector_store.delete_document, document_id)
+            self.query_cache.clear()
             raise
 
+    @staticmethod
+    def _indexing_stats(
+        document_id: str,
+        filename: str,
+        metadata: dict,
+        chunk_count: int,
+        segments_count: int
+    ) -> dict:
+        """Log and build the statistics returned after indexing a document."""
+        logger.info(f"Indexed {chunk_count} chunks from {segments_count} segments of {filename}")
+
+        return {
+            "document_id": document_id,
+            "filename": filename,
+            "page_count": metadata["page_count"],
+            "chunk_count": chunk_count,
+            "segments_count": segments_count,
+            "total_chars": metadata["total_chars"]
+        }
+
     def delete_document(self, document_id: str) -> bool:
         """
         Delete a document from the index.
@@ -208,8 +424,22 @@ Provide a short, direct answer in simple English (2-3 sentences maximum). NO cit
         Returns:
             True if successful, False otherwise
         """
+        self.query_cache.clear()
         return self.vector_store.delete_document(document_id)
 
+    def delete_documents_batch(self, document_ids: List[str]) -> bool:
+        """
+        Delete several documents from the index in a single operation.
+
+        Args:
+            document_ids: Document IDs to delete
+
+        Returns:
+            True if successful, False otherwise
+        """
+        self.query_cache.clear()
+        return self.vector_store.delete_documents(document_ids)
+
     def get_document_stats(self, document_id: str) -> dict:
         """
         Get statistics for a document.
@@ -226,3 +456,14 @@ Provide a short, direct answer in simple English (2-3 sentences maximum). NO cit
             "document_id": document_id,
             "chunk_count": chunk_count
         }
+
+
+@lru_cache(maxsize=1)
+def get_rag_service() -> RAGService:
+    """
+    Get the process-wide RAG service.
+
+    All API routers share one instance so the LLM client, embedding model
+    and Chroma client are only created once.
+    """
+    return RAGService()
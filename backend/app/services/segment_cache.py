@@ -0,0 +1,156 @@
+"""Content-addressed on-disk cache of extracted document segments."""
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Iterator, Optional
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Bump when extraction output changes so stale pickles are never returned
+SEGMENT_CACHE_VERSION = 9
+
+# Read size when hashing files, so large uploads are never held in memory whole
+_HASH_CHUNK_SIZE = 1 << 20
+
+
+def file_digest(path: str) -> str:
+    """
+    Hash a file's contents in fixed-size chunks.
+
+    Args:
+        path: Path to the file
+
+    Returns:
+        Hex BLAKE2b digest (128-bit) of the file's bytes
+    """
+    hasher = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        while chunk := f.read(_HASH_CHUNK_SIZE):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class SegmentCache:
+    """Pickled extraction results keyed by file content hash, stored as a stream of records."""
+
+    def __init__(self, cache_dir: str = None):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir: Directory holding the cached pickles
+        """
+        self.cache_dir = Path(cache_dir or settings.segment_cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def key(self, file_path: str, variant: str = "") -> str:
+        """
+        Build the cache key for a file.
+
+        Args:
+            file_path: Path to the document file
+            variant: Anything besides the bytes that changes the extraction
+                output (file type, extractor choice)
+
+        Returns:
+            Cache key string
+        """
+        return f"v{SEGMENT_CACHE_VERSION}_{variant}_{file_digest(file_path)}"
+
+    def load(self, key: str) -> Optional[Iterator[Any]]:
+        """
+        Open a cached entry for streaming.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Iterator over the entry's records in the order they were
+            written, or None on a miss or unreadable entry
+        """
+        path = self.cache_dir / f"{key}.pkl"
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            return None
+
+        # Read the first record eagerly so a bad entry counts as a miss
+        try:
+            first = pickle.load(f)
+        except Exception as e:
+            f.close()
+            logger.warning(f"Discarding unreadable segment cache entry {path}: {e}")
+            return None
+
+        return self._records(f, first)
+
+    @staticmethod
+    def _records(f: BinaryIO, first: Any) -> Iterator[Any]:
+        """Yield the records of an open cache entry, closing it at the end."""
+        with f:
+            yield first
+            while True:
+                try:
+                    yield pickle.load(f)
+                except EOFError:
+                    return
+
+    @contextmanager
+    def writer(self, key: str) -> Iterator[Callable[[Any], None]]:
+        """
+        Write an entry record by record.
+
+        Each record is pickled as it arrives, so the entry is never held in
+        memory whole. The entry is committed atomically with os.replace only
+        if the block exits normally; on any error, or if a consuming
+        generator is abandoned, the partial file is discarded. Write
+        failures (e.g. a full disk) are logged and never interrupt the
+        caller.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Context manager yielding a function that appends one record
+        """
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            f = os.fdopen(fd, "wb")
+        except OSError as e:
+            logger.warning(f"Could not write segment cache entry {key}: {e}")
+            yield lambda record: None
+            return
+
+        failed = False
+
+        def write(record: Any) -> None:
+            nonlocal failed
+            if failed:
+                return
+            try:
+                pickle.dump(record, f, protocol=pickle.HIGHEST_PROTOCOL)
+            except OSError as e:
+                failed = True
+                logger.warning(f"Could not write segment cache entry {key}: {e}")
+
+        try:
+            with f:
+                yield write
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+        if failed:
+            os.unlink(tmp_path)
+            return
+
+        try:
+            os.replace(tmp_path, self.cache_dir / f"{key}.pkl")
+        except OSError as e:
+            logger.warning(f"Could not write segment cache entry {key}: {e}")
+            os.unlink(tmp_path)
@@ -1,36 +1,80 @@
 """Vector database service for document embeddings."""
+import asyncio
 import logging
+import math
+from collections import Counter
 from typing import List, Dict, Any, Optional
 import chromadb
+import numpy as np
 from chromadb.config import Settings as ChromaSettings
-from langchain_openai import OpenAIEmbeddings
-from langchain_ollama import OllamaEmbeddings
-from langchain_community.vectorstores import Chroma
-from app.services.chunker import DocumentChunk
+from app.services.ann_index import ANNIndex
+from app.services.chunker import ChunkBatch, DocumentChunk
+from app.services.embedding_cache import CachedEmbeddings
 from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+# HNSW index settings for new collections. Embeddings are normalized before
+# insertion, so inner product ranks exactly as cosine similarity would
+# without a norm per comparison; the graph parameters trade a little build
+# time for recall. Chroma fixes these when a collection is created, so
+# existing collections keep their original settings.
+HNSW_COLLECTION_METADATA = {
+    "hnsw:space": "ip",
+    "hnsw:M": 16,
+    "hnsw:construction_ef": 64,
+    "hnsw:search_ef": 100,
+}
+
+# Rows fetched per page when rebuilding the in-memory index from Chroma
+ANN_LOAD_PAGE_SIZE = 1000
+
+def _chunk_from_record(chunk_id: str, text: str, metadata: Dict[str, Any]) -> DocumentChunk:
+    """Rebuild a DocumentChunk from a stored text and its metadata."""
+    # Positional in field order; chunk_index is not stored in metadata
+    return DocumentChunk(
+        chunk_id, text, metadata["page"], metadata["char_start"], metadata["char_end"],
+        metadata["document_id"], 0, metadata.get("filename", "")
+    )
+
 
 class VectorStore:
     """Manage vector embeddings and similarity search."""
 
-    def __init__(self):
-        """Initialize vector store with ChromaDB."""
-        # Initialize embedding model based on provider
+    def __init__(self, batch_size: Optional[int] = None):
+        """
+        Initialize vector store with ChromaDB.
+
+        Args:
+            batch_size: Chunks per insert call (defaults to
+                settings.vector_store_batch_size)
+        """
+        self.batch_size = max(1, batch_size or settings.vector_store_batch_size)
+
+        # Initialize embedding model based on provider (only the configured
+        # provider's client library is imported)
         if settings.ai_provider == "ollama":
-            self.embedding_model = OllamaEmbeddings(
+            from langchain_ollama import OllamaEmbeddings
+
+            embedding_model = OllamaEmbeddings(
                 model=settings.ollama_embedding_model,
                 base_url=settings.ollama_base_url
             )
+            model_name = f"ollama:{settings.ollama_embedding_model}"
             logger.info(f"Using Ollama embeddings: {settings.ollama_embedding_model}")
         else:
-            self.embedding_model = OpenAIEmbeddings(
+            from langchain_openai import OpenAIEmbeddings
+
+            embedding_model = OpenAIEmbeddings(
                 openai_api_key=settings.openai_api_key,
                 model=settings.embedding_model
             )
+            model_name = f"openai:{settings.embedding_model}"
             logger.info(f"Using OpenAI embeddings: {settings.embedding_model}")
 
+        # Reuse embeddings for chunk texts seen in earlier uploads
+        self.embedding_model = CachedEmbeddings(embedding_model, model_name)
+
         # Initialize ChromaDB client
         self.chroma_client = chromadb.PersistentClient(
             path=settings.chroma_db_path,
@@ -43,54 +87,150 @@ class VectorStore:
         # Collection name
         self.collection_name = "document_chunks"
 
-        # Initialize LangChain's Chroma wrapper
-        self.vectorstore = Chroma(
-            client=self.chroma_client,
-            collection_name=self.collection_name,
-            embedding_function=self.embedding_model
+        # Create the collection with explicit HNSW settings. The handle is
+        # kept for the store's lifetime so later calls skip the collection
+        # lookup. Embeddings are always computed here, never by Chroma.
+        self._collection = collection = self.chroma_client.get_or_create_collection(
+            name=self.collection_name,
+            metadata=HNSW_COLLECTION_METADATA,
+            embedding_function=None
         )
+        self._space = (collection.metadata or {}).get("hnsw:space", "l2")
+        if self._space != HNSW_COLLECTION_METADATA["hnsw:space"]:
+            logger.warning(
+                f"Collection {self.collection_name} was created with a different distance metric; "
+                "clear the database to rebuild it with inner-product distance"
+            )
+
+        # In-process HNSW mirror serving reads without going through SQLite
+        self.ann: Optional[ANNIndex] = None
+        if settings.in_memory_ann:
+            self.ann = ANNIndex(vectors_dir=settings.chroma_db_path)
+            self._load_ann(collection)
 
         logger.info(f"Vector store initialized with collection: {self.collection_name}")
 
-    def add_chunks(self, chunks: List[DocumentChunk]) -> List[str]:
+    def _load_ann(self, collection) -> None:
+        """Rebuild the in-memory index from every chunk stored in Chroma."""
+        offset = 0
+        while True:
+            page = collection.get(
+                include=["embeddings", "documents", "metadatas"],
+                limit=ANN_LOAD_PAGE_SIZE,
+                offset=offset
+            )
+            ids = page["ids"]
+            if not ids:
+                break
+            self.ann.add(
+                [
+                    _chunk_from_record(chunk_id, text, metadata)
+                    for chunk_id, text, metadata in zip(ids, page["documents"], page["metadatas"])
+                ],
+                page["embeddings"]
+            )
+            offset += len(ids)
+
+        logger.info(f"Loaded {len(self.ann)} chunks into in-memory index")
+
+    def _existing_ids(self, ids: List[str]) -> set:
+        """Return which of ``ids`` are already stored (IDs only are loaded)."""
+        return set(self._collection.get(ids=ids, include=[])["ids"])
+
+    def _add(self, batch: ChunkBatch) -> List[str]:
         """
-        Add document chunks to the vector store.
+        Insert a columnar batch, splitting the writes into fixed-size batches.
+
+        Chunks whose IDs are already stored are dropped before their metadata
+        is built, so re-running an ingestion neither re-embeds them nor
+        rewrites their HNSW entries; a fully indexed batch costs one ID lookup.
+        """
+        batch_size = self.batch_size
+        try:
+            collection = self._collection
+
+            existing = self._existing_ids(batch.ids)
+            if existing:
+                batch = batch.select([i for i, chunk_id in enumerate(batch.ids) if chunk_id not in existing])
+                logger.info(f"Skipping {len(existing)} chunks already in vector store")
+                if not len(batch):
+                    return []
+
+            texts, ids = batch.texts, batch.ids
+            metadatas = batch.metadatas()
+
+            # Embed everything in one call (the provider requests are batched
+            # by CachedEmbeddings), then write straight to the collection
+            embeddings = np.asarray(self.embedding_model.embed_documents(texts), dtype=np.float32)
+            embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True).clip(min=1e-12)
+
+            # Bounded batches keep each SQLite transaction and HNSW update small
+            for i in range(0, len(ids), batch_size):
+                collection.upsert(
+                    ids=ids[i:i + batch_size],
+                    embeddings=embeddings[i:i + batch_size],
+                    documents=texts[i:i + batch_size],
+                    metadatas=metadatas[i:i + batch_size]
+                )
+
+            if self.ann is not None:
+                # map() walks the three columns in C, with no per-chunk bytecode
+                self.ann.add(list(map(_chunk_from_record, ids, texts, metadatas)), embeddings)
+
+            logger.info(f"Added {len(ids)} chunks to vector store")
+            return ids
+
+        except Exception as e:
+            logger.error(f"Error adding chunks to vector store: {e}")
+            raise
+
+    def add_batch(self, batch: ChunkBatch) -> List[str]:
+        """
+        Add a columnar batch of chunks to the vector store.
 
         Args:
-            chunks: List of DocumentChunks to add
+            batch: ChunkBatch produced by IntelligentChunker
 
         Returns:
             List of chunk IDs that were added
         """
-        if not chunks:
+        if not len(batch):
             logger.warning("No chunks to add to vector store")
             return []
 
-        try:
-            # Prepare data for insertion
-            texts = [chunk.text for chunk in chunks]
-            metadatas = [chunk.metadata for chunk in chunks]
-            ids = [chunk.chunk_id for chunk in chunks]
-
-            # Add to vector store
-            self.vectorstore.add_texts(
-                texts=texts,
-                metadatas=metadatas,
-                ids=ids
-            )
+        return self._add(batch)
 
-            logger.info(f"Added {len(chunks)} chunks to vector store")
-            return ids
+    async def add_batch_async(self, batch: ChunkBatch) -> List[str]:
+        """
+        Add a columnar batch of chunks without blocking the event loop.
 
-        except Exception as e:
-            logger.error(f"Error adding chunks to vector store: {e}")
-            raise
+        Args:
+            batch: ChunkBatch produced by IntelligentChunker
+
+        Returns:
+            List of chunk IDs that were added
+        """
+        if not len(batch):
+            logger.warning("No chunks to add to vector store")
+            return []
+
+        batch_size = self.batch_size
+        added = []
+        # Each slice's ID lookup, embedding requests and Chroma write block,
+        # so they run off the event loop, which stays free to serve requests
+        # in between
+        for i in range(0, len(batch), batch_size):
+            added += await asyncio.to_thread(
+                self._add, batch.select(range(i, min(i + batch_size, len(batch))))
+            )
+        return added
 
     def similarity_search(
         self,
         query: str,
         k: int = 5,
-        filter_dict: Optional[Dict[str, Any]] = None
+        filter_dict: Optional[Dict[str, Any]] = None,
+        query_embedding: Optional[List[float]] = None
     ) -> List[tuple[DocumentChunk, float]]:
         """
         Search for similar chunks.
@@ -99,36 +239,44 @@ class VectorStore:
             query: Query string
             k: Number of results to return
             filter_dict: Optional metadata filter (e.g., {"document_id": "doc123"})
+            query_embedding: Embedding of ``query`` if the caller already has
+                one; computed here otherwise
 
         Returns:
             List of tuples (DocumentChunk, relevance_score)
         """
         try:
-            # Perform similarity search with scores
-            results = self.vectorstore.similarity_search_with_relevance_scores(
-                query=query,
-                k=k,
-                filter=filter_dict
-            )
-
-            # Convert results to DocumentChunk objects
-            chunk_results = []
-            for doc, score in results:
-                metadata = doc.metadata
-
-                # Reconstruct DocumentChunk from metadata
-                chunk = DocumentChunk(
-                    chunk_id=metadata["chunk_id"],
-                    text=doc.page_content,
-                    page_number=metadata["page"],
-                    char_start=metadata["char_start"],
-                    char_end=metadata["char_end"],
-                    document_id=metadata["document_id"],
-                    chunk_index=0,  # Not stored in metadata
-                    metadata=metadata
+            if query_embedding is None:
+                query_embedding = self.embedding_model.embed_query(query)
+
+            document_id = (filter_dict or {}).get("document_id")
+            if self.ann is not None and (
+                not filter_dict or (set(filter_dict) == {"document_id"} and isinstance(document_id, str))
+            ):
+                # The in-memory index handles a plain document filter itself;
+                # operator filters such as {"$in": [...]} go to Chroma
+                chunk_results = self.ann.search(query_embedding, k, document_id=document_id)
+            else:
+                query_embedding = np.asarray(query_embedding, dtype=np.float32)
+                query_embedding = query_embedding / max(float(np.linalg.norm(query_embedding)), 1e-12)
+
+                # Perform similarity search with distances
+                results = self._collection.query(
+                    query_embeddings=[query_embedding],
+                    n_results=k,
+                    where=filter_dict,
+                    include=["documents", "metadatas", "distances"]
                 )
 
-                chunk_results.append((chunk, score))
+                # Convert results to DocumentChunk objects
+                to_relevance = self._relevance
+                chunk_results = [
+                    (_chunk_from_record(chunk_id, text, metadata), to_relevance(distance))
+                    for chunk_id, text, metadata, distance in zip(
+                        results["ids"][0], results["documents"][0],
+                        results["metadatas"][0], results["distances"][0]
+                    )
+                ]
 
             logger.info(f"Found {len(chunk_results)} similar chunks for query")
             return chunk_results
@@ -137,6 +285,38 @@ class VectorStore:
             logger.error(f"Error performing similarity search: {e}")
             raise
 
+    def _relevance(self, distance: float) -> float:
+        """Convert a Chroma distance for this collection's metric into a relevance score."""
+        if self._space == "l2":
+            # Same scale the LangChain wrapper used for older L2 collections
+            return 1.0 - distance / math.sqrt(2)
+        # ip and cosine distances are both 1 - similarity
+        return 1.0 - distance
+
+    async def asimilarity_search(
+        self,
+        query: str,
+        k: int = 5,
+        filter_dict: Optional[Dict[str, Any]] = None,
+        query_embedding: Optional[List[float]] = None
+    ) -> List[tuple[DocumentChunk, float]]:
+        """
+        Search for similar chunks in a worker thread.
+
+        The embedding request and Chroma query both block, so callers on the
+        event loop await this instead of calling similarity_search directly.
+
+        Args:
+            query: Query string
+            k: Number of results to return
+            filter_dict: Optional metadata filter (e.g., {"document_id": "doc123"})
+            query_embedding: Embedding of ``query`` if the caller already has one
+
+        Returns:
+            List of tuples (DocumentChunk, relevance_score)
+        """
+        return await asyncio.to_thread(self.similarity_search, query, k, filter_dict, query_embedding)
+
     def delete_document(self, document_id: str) -> bool:
         """
         Delete all chunks for a specific document.
@@ -148,13 +328,14 @@ class VectorStore:
             True if successful, False otherwise
         """
         try:
-            # Get the collection
-            collection = self.chroma_client.get_collection(self.collection_name)
+            collection = self._collection
 
             # Delete all chunks with this document_id
             collection.delete(
                 where={"document_id": document_id}
             )
+            if self.ann is not None:
+                self.ann.delete_documents([document_id])
 
             logger.info(f"Deleted all chunks for document {document_id}")
             return True
@@ -163,6 +344,34 @@ class VectorStore:
             logger.error(f"Error deleting document {document_id}: {e}")
             return False
 
+    def delete_documents(self, document_ids: List[str]) -> bool:
+        """
+        Delete all chunks for several documents in one call.
+
+        Args:
+            document_ids: Document IDs to delete
+
+        Returns:
+            True if successful, False otherwise
+        """
+        if not document_ids:
+            return True
+
+        try:
+            collection = self._collection
+            collection.delete(
+                where={"document_id": {"$in": list(document_ids)}}
+            )
+            if self.ann is not None:
+                self.ann.delete_documents(document_ids)
+
+            logger.info(f"Deleted all chunks for {len(document_ids)} document(s)")
+            return True
+
+        except Exception as e:
+            logger.error(f"Error deleting documents {document_ids}: {e}")
+            return False
+
     def get_document_chunk_count(self, document_id: str) -> int:
         """
         Get the number of chunks for a document.
@@ -174,11 +383,12 @@ class VectorStore:
             Number of chunks
         """
         try:
-            collection = self.chroma_client.get_collection(self.collection_name)
+            collection = self._collection
 
-            # Query with filter
+            # Query with filter; IDs only, no embeddings or payloads loaded
             results = collection.get(
-                where={"document_id": document_id}
+                where={"document_id": document_id},
+                include=[]
             )
 
             return len(results["ids"]) if results and "ids" in results else 0
@@ -187,26 +397,32 @@ class VectorStore:
             logger.error(f"Error getting chunk count for {document_id}: {e}")
             return 0
 
-    def list_documents(self) -> List[str]:
+    def document_chunk_counts(self) -> Dict[str, int]:
         """
-        List all unique document IDs in the vector store.
+        Count the stored chunks of every document.
 
         Returns:
-            List of document IDs
+            Mapping of document ID to chunk count
         """
         try:
-            collection = self.chroma_client.get_collection(self.collection_name)
-            results = collection.get()
-
-            # Extract unique document IDs from metadata
-            document_ids = set()
-            if results and "metadatas" in results:
-                for metadata in results["metadatas"]:
-                    if "document_id" in metadata:
-                        document_ids.add(metadata["document_id"])
+            collection = self._collection
+            # Metadata only; embeddings and documents are never needed here
+            results = collection.get(include=["metadatas"])
 
-            return list(document_ids)
+            metadatas = results.get("metadatas") or [] if results else []
+            return Counter(
+                metadata["document_id"] for metadata in metadatas if metadata and "document_id" in metadata
+            )
 
         except Exception as e:
-            logger.error(f"Error listing documents: {e}")
-            return []
+            logger.error(f"Error counting document chunks: {e}")
+            return {}
+
+    def list_documents(self) -> List[str]:
+        """
+        List all unique document IDs in the vector store.
+
+        Returns:
+            List of document IDs
+        """
+        return list(self.document_chunk_counts())
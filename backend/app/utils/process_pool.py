@@ -0,0 +1,72 @@
+"""Shared process pool for CPU-bound document processing."""
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _init_worker() -> None:
+    """Configure logging in a freshly spawned worker to match the server."""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """
+    Get the process-wide worker pool, creating it on first use.
+
+    Workers are spawned rather than forked so they don't inherit the
+    server's threads, open SQLite handles or Chroma client state. Spawn
+    re-imports the launching module in every worker, so app.main builds
+    nothing at import time (see create_app), and the worker tasks live in
+    modules that never construct services.
+
+    Returns:
+        Shared ProcessPoolExecutor
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            max_workers = settings.max_worker_processes or os.cpu_count() or 1
+            _executor = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker
+            )
+            logger.info(f"Started process pool with {max_workers} workers")
+        return _executor
+
+
+def discard_process_pool(executor: ProcessPoolExecutor) -> None:
+    """
+    Drop a pool that raised BrokenProcessPool so the next call starts a new one.
+
+    Args:
+        executor: The pool that broke; ignored if it has already been replaced
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is executor:
+            _executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+    logger.warning("Discarded broken process pool; a new one starts on next use")
+
+
+def shutdown_process_pool() -> None:
+    """Shut down the worker pool if it was started."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+            logger.info("Process pool shut down")
@@ -0,0 +1,27 @@
+"""Helpers for the upload directory."""
+import os
+from pathlib import Path
+from typing import Dict
+from app.config import settings
+
+
+def scan_uploads() -> Dict[str, os.DirEntry]:
+    """
+    Map document IDs (file stems) in the upload directory to their entries.
+
+    Uploads are stored as ``{document_id}{ext}`` with the original extension,
+    so matching on the stem finds every supported format in a single readdir
+    instead of probing each possible extension.
+
+    Returns:
+        Dictionary of document ID to directory entry
+    """
+    try:
+        with os.scandir(settings.upload_dir) as it:
+            return {
+                Path(entry.name).stem: entry
+                for entry in it
+                if entry.is_file() and not entry.name.startswith(".")
+            }
+    except FileNotFoundError:
+        return {}
@@ -1,28 +1,56 @@
 #!/usr/bin/env python3
 """Clear the ChromaDB database to start fresh."""
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+# Threads removing top-level entries at once; unlink/rmdir are syscall-bound
+REMOVE_WORKERS = 8
+
+
+def _remove_entry(path: Path) -> None:
+    """Remove a file or directory tree."""
+    if path.is_dir() and not path.is_symlink():
+        shutil.rmtree(path)
+    else:
+        path.unlink()
+
+
+def remove_tree(root: Path) -> None:
+    """Remove a directory, deleting its top-level entries in parallel."""
+    with ThreadPoolExecutor(max_workers=REMOVE_WORKERS) as executor:
+        # list() re-raises the first error from any worker
+        list(executor.map(_remove_entry, root.iterdir()))
+    root.rmdir()
+
+
 def clear_database():
     """Remove the ChromaDB database directory."""
     chroma_path = Path("./chroma_db")
     uploads_path = Path("./uploads")
+    metadata_db_path = Path("./documents.db")
 
     if chroma_path.exists():
         print(f"Removing ChromaDB database at {chroma_path}")
-        shutil.rmtree(chroma_path)
+        remove_tree(chroma_path)
         print("✓ ChromaDB cleared")
     else:
         print("ChromaDB directory not found")
 
     if uploads_path.exists():
         print(f"\nRemoving uploaded files at {uploads_path}")
-        shutil.rmtree(uploads_path)
+        remove_tree(uploads_path)
         uploads_path.mkdir()
         print("✓ Uploads cleared")
     else:
         print("Uploads directory not found")
 
+    if metadata_db_path.exists():
+        print(f"\nRemoving document metadata at {metadata_db_path}")
+        for suffix in ("", "-wal", "-shm"):
+            Path(f"{metadata_db_path}{suffix}").unlink(missing_ok=True)
+        print("✓ Document metadata cleared")
+
     print("\n✅ Database cleared successfully!")
     print("Restart the backend server to create a fresh database.")
 